@@ -0,0 +1,68 @@
+"""
+Per-channel pins and calibration.
+
+The list of dicts is easy to edit, but costs RAM and boot time on the
+board. tools/compile_config.py compiles it on the host into
+config_compiled.py, and the board only imports this module when that
+table is missing (see config_table.load_channel_table()).
+"""
+
+from config import HOMING_DIR_UP_VALUE, HOMING_DIR_DOWN_VALUE, DEFAULT_STEPS_PER_ML
+
+CHANNEL_CONFIGS = [
+    {
+        "name": "CH1",
+        "enabled": True,
+        "dir_pin": 28,
+        "pul_pin": 6,
+        "valve_pin": 0,
+        "limit_id": 0,
+        "dir_up": HOMING_DIR_UP_VALUE,
+        "dir_down": HOMING_DIR_DOWN_VALUE,
+        "steps_per_ml": DEFAULT_STEPS_PER_ML,
+    },
+    {
+        "name": "CH2",
+        "enabled": True,
+        "dir_pin": 27,
+        "pul_pin": 7,
+        "valve_pin": 1,
+        "limit_id": 1,
+        "dir_up": HOMING_DIR_UP_VALUE,
+        "dir_down": HOMING_DIR_DOWN_VALUE,
+        "steps_per_ml": DEFAULT_STEPS_PER_ML,
+    },
+    {
+        "name": "CH3",
+        "enabled": True,
+        "dir_pin": 26,
+        "pul_pin": 8,
+        "valve_pin": 2,
+        "limit_id": 2,
+        "dir_up": HOMING_DIR_UP_VALUE,
+        "dir_down": HOMING_DIR_DOWN_VALUE,
+        "steps_per_ml": DEFAULT_STEPS_PER_ML,
+    },
+    {
+        "name": "CH4",
+        "enabled": True,
+        "dir_pin": 22,
+        "pul_pin": 9,
+        "valve_pin": 3,
+        "limit_id": 3,
+        "dir_up": HOMING_DIR_UP_VALUE,
+        "dir_down": HOMING_DIR_DOWN_VALUE,
+        "steps_per_ml": DEFAULT_STEPS_PER_ML,
+    },
+    {
+        "name": "CH5",
+        "enabled": True,
+        "dir_pin": 21,
+        "pul_pin": 10,
+        "valve_pin": 4,
+        "limit_id": 4,
+        "dir_up": HOMING_DIR_UP_VALUE,
+        "dir_down": HOMING_DIR_DOWN_VALUE,
+        "steps_per_ml": DEFAULT_STEPS_PER_ML,
+    },
+]
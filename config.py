@@ -4,9 +4,22 @@ DEFAULT_PULSE_US = 1000  # base pulse width for step impulses
 MIN_PULSE_US = 400           # fastest allowed (smaller = faster)
 MAX_PULSE_US = 3000          # slowest allowed
 
+# Hot-loop implementation: "auto", "viper", "native" or "python"
+# (see drivers/fast_path.py; unavailable variants fall back to slower ones)
+FAST_PATH = "auto"
+# Steps per fast-loop call; Ctrl-C and soft IRQs (UART RX) are only
+# serviced between calls
+FAST_PATH_CHUNK_STEPS = 250
+# Spare GPIOs for modes/mode_bench_step.py (nothing connected!)
+BENCH_DIR_PIN = 14
+BENCH_PUL_PIN = 15
+BENCH_IN_PIN = 11
+BENCH_STEPS = 20000
+
 # Steps limit during homing to avoid endless movement if limit switch fails
 HOMING_MAX_STEPS = 15000     # safety limit for homing travel
 HOMING_BACKOFF_STEPS = 50    # small backoff after hitting limit
+HOMING_SLOW_PULSE_US = 2000  # slow homing used to count steps precisely
 
 # Direction convention for homing:
 # Value written to DIR pin that moves the plunger "up" (towards limit switch)
@@ -14,65 +27,62 @@ HOMING_DIR_UP_VALUE = 0      # set to 0 or 1 depending on your wiring
 HOMING_DIR_DOWN_VALUE = 1    # opposite direction
 # Example calibration: how many steps per 1 ml (to be tuned experimentally)
 DEFAULT_STEPS_PER_ML = 362
+# Usable syringe volume per channel (used for refill planning)
+SYRINGE_CAPACITY_ML = 5.0    # TODO: set real syringe volume
+
+# Speed sweep characterization (modes/mode_speed_sweep.py)
+SPEED_SWEEP_STEPS = 2000             # steps out and back at each tested speed
+SPEED_SWEEP_PULSE_DECREMENT_US = 100 # pulse_us reduction between tested speeds
+SPEED_SWEEP_TOLERANCE_STEPS = 2      # allowed homing count deviation (switch hysteresis)
+SPEED_SWEEP_MARGIN = 1.25            # safe pulse_us = fastest reliable pulse_us * margin
+# Per-channel pulse_us written by the speed sweep, applied at startup
+SPEED_PROFILE_FILE = "speed_profile.json"
+
+# Valve switching latency (time from MOSFET edge until the valve is fully
+# open / closed). Per-channel override: "valve_open_ms" / "valve_close_ms".
+VALVE_OPEN_MS = 30           # TODO: measure for the real valves
+VALVE_CLOSE_MS = 30          # TODO: measure for the real valves
+# PUMP SOLUTION: open each channel valve around its dispense
+# (valve-gated sequence via ValveScheduler). False = motion only.
+PUMP_SOLUTION_USE_VALVES = False
 
 # GPIO numbers for the shared limit switch bus
 LIMIT_BUS_PIN = 20  # TODO: set real pin number
 LIMIT_BUS_ACTIVE_LOW = True
 LIMIT_DEBOUNCE_MS = 5
 
+# Extra commands, (key, module, func, args[, options]) with the handler
+# in modes/<module>.py, e.g. ("CH PRIME", "cmd_prime", "prime", ("volume",)).
+# Handlers are imported on first use (see command_registry.register_entries())
+EXTRA_COMMANDS = ()
+
+# Mode started by main.main() (module name inside modes/, imported on demand)
+BOOT_MODE = "mode_serial_control"
+# Print time (ms) and heap (bytes) per boot phase
+BOOT_PROFILE = True
+
+# Host command link used by mode_serial_control:
+#   "stdio" - USB REPL (sys.stdin / print), shared with debug output
+#   "uart"  - dedicated machine.UART port (see UART_* below)
+SERIAL_TRANSPORT = "stdio"
+UART_ID = 0
+UART_BAUDRATE = 115200
+UART_TX_PIN = 12             # TODO: set real pin number
+UART_RX_PIN = 13             # TODO: set real pin number
+UART_RXBUF_SIZE = 1024       # C-level receive buffer, filled by the hardware IRQ
+UART_RX_RING_SIZE = 2048     # bytes, power of two larger than UART_RXBUF_SIZE
+UART_LINE_MAX = 128          # longest accepted command line
+UART_TX_BUFFER_SIZE = 256    # reply buffer, flushed after each command
+
+# Push telemetry (SUBSCRIBE <rate_hz> [fields])
+TELEMETRY_MAX_RATE_HZ = 50
+TELEMETRY_HEARTBEAT_MS = 1000  # full frame at least this often
+# Publish from a thread on the second core, so frames never delay motion.
+# Without _thread support, frames are sent between commands.
+TELEMETRY_USE_THREAD = True
+
 MAIN_PUMP_PIN = 17
 SERVO_PIN = 16 
 GLOBAL_SOLENOID_PIN = 5
 
-CHANNEL_CONFIGS = [
-    {
-        "name": "CH1",
-        "enabled": True,
-        "dir_pin": 28,
-        "pul_pin": 6,
-        "valve_pin": 0,
-        "dir_up": HOMING_DIR_UP_VALUE,
-        "dir_down": HOMING_DIR_DOWN_VALUE,
-        "steps_per_ml": DEFAULT_STEPS_PER_ML,
-    },
-    {
-        "name": "CH2",
-        "enabled": True,
-        "dir_pin": 27,
-        "pul_pin": 7,
-        "valve_pin": 1,
-        "dir_up": HOMING_DIR_UP_VALUE,
-        "dir_down": HOMING_DIR_DOWN_VALUE,
-        "steps_per_ml": DEFAULT_STEPS_PER_ML,
-    },
-    {
-        "name": "CH3",
-        "enabled": True,
-        "dir_pin": 26,
-        "pul_pin": 8,
-        "valve_pin": 2,
-        "dir_up": HOMING_DIR_UP_VALUE,
-        "dir_down": HOMING_DIR_DOWN_VALUE,
-        "steps_per_ml": DEFAULT_STEPS_PER_ML,
-    },
-    {
-        "name": "CH4",
-        "enabled": True,
-        "dir_pin": 22,
-        "pul_pin": 9,
-        "valve_pin": 3,
-        "dir_up": HOMING_DIR_UP_VALUE,
-        "dir_down": HOMING_DIR_DOWN_VALUE,
-        "steps_per_ml": DEFAULT_STEPS_PER_ML,
-    },
-    {
-        "name": "CH5",
-        "enabled": True,
-        "dir_pin": 21,
-        "pul_pin": 10,
-        "valve_pin": 4,
-        "dir_up": HOMING_DIR_UP_VALUE,
-        "dir_down": HOMING_DIR_DOWN_VALUE,
-        "steps_per_ml": DEFAULT_STEPS_PER_ML,
-    },
-]
+# Per-channel pins and calibration: see channel_config.py
@@ -0,0 +1,129 @@
+"""
+Compact channel table.
+
+channel_config.CHANNEL_CONFIGS is a list of dicts because that is easy
+to edit. At runtime we only need a few numbers per channel, so the list
+is compiled into a tuple of tuples (one per enabled channel).
+
+tools/compile_config.py runs this on the host and writes the result to
+config_compiled.py. With that file present the board never imports
+channel_config.py, so the dicts are not built at boot.
+
+The compiled file records TABLE_VERSION and a CRC32 of the config source
+files; if either does not match (stale table after a firmware update or
+a config edit without recompiling), the board compiles the dicts instead.
+"""
+
+import config
+
+try:
+    from binascii import crc32
+except ImportError:  # firmware without CRC32 support
+    crc32 = None
+
+
+# Field order of one CHANNEL_TABLE row
+F_NAME = 0
+F_DIR_PIN = 1
+F_PUL_PIN = 2
+F_VALVE_PIN = 3
+F_LIMIT_ID = 4
+F_DIR_UP = 5
+F_DIR_DOWN = 6
+F_STEPS_PER_ML = 7
+F_VALVE_OPEN_MS = 8
+F_VALVE_CLOSE_MS = 9
+ROW_LEN = 10
+
+# Bump whenever the row layout (F_* above) changes
+TABLE_VERSION = 2
+
+# Files whose contents the compiled table depends on
+SOURCE_FILES = ("config.py", "channel_config.py")
+
+
+def compile_channels(channel_configs):
+    """
+    Convert channel config dicts into a tuple of row tuples.
+    Channels with enabled=False are skipped.
+    Missing limit_id defaults to the position in the config list.
+    """
+    rows = []
+
+    for index, ch_conf in enumerate(channel_configs):
+        if not ch_conf.get("enabled", True):
+            print("Skipping disabled channel:", ch_conf.get("name"))
+            continue
+
+        rows.append((
+            ch_conf["name"],
+            ch_conf["dir_pin"],
+            ch_conf["pul_pin"],
+            ch_conf["valve_pin"],
+            ch_conf.get("limit_id", index),
+            1 if ch_conf.get("dir_up", config.HOMING_DIR_UP_VALUE) else 0,
+            1 if ch_conf.get("dir_down", config.HOMING_DIR_DOWN_VALUE) else 0,
+            ch_conf.get("steps_per_ml", config.DEFAULT_STEPS_PER_ML),
+            ch_conf.get("valve_open_ms", config.VALVE_OPEN_MS),
+            ch_conf.get("valve_close_ms", config.VALVE_CLOSE_MS),
+        ))
+
+    return tuple(rows)
+
+
+def source_hash(paths=SOURCE_FILES):
+    """
+    CRC32 over the contents of the config source files (missing files
+    count as empty). Returns None if the firmware has no CRC32.
+    """
+    if crc32 is None:
+        return None
+
+    buf = bytearray(256)
+    mv = memoryview(buf)
+    crc = 0
+    for path in paths:
+        try:
+            f = open(path, "rb")
+        except OSError:
+            continue
+        with f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                crc = crc32(mv[:n], crc)
+    return crc
+
+
+def _stale_reason(compiled):
+    """Why a config_compiled module cannot be used, or None if it is current."""
+    if getattr(compiled, "TABLE_VERSION", None) != TABLE_VERSION:
+        return "table version mismatch"
+    for row in compiled.CHANNEL_TABLE:
+        if len(row) != ROW_LEN:
+            return "row length mismatch"
+    crc = source_hash()
+    if crc is not None and getattr(compiled, "CONFIG_HASH", None) != crc:
+        return "config changed since compile"
+    return None
+
+
+def load_channel_table():
+    """
+    Return the precompiled table if config_compiled.py exists and is
+    current, otherwise compile channel_config.CHANNEL_CONFIGS now.
+    """
+    try:
+        import config_compiled
+    except ImportError:
+        config_compiled = None
+
+    if config_compiled is not None:
+        reason = _stale_reason(config_compiled)
+        if reason is None:
+            return config_compiled.CHANNEL_TABLE
+        print("config_compiled.py ignored (" + reason + "), re-run tools/compile_config.py")
+
+    from channel_config import CHANNEL_CONFIGS
+    return compile_channels(CHANNEL_CONFIGS)
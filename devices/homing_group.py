@@ -0,0 +1,186 @@
+from drivers.stepper_group import StepperGroup
+from drivers.console import log
+from devices.pump_channel import ERR_HOME_FAILED
+import config
+
+
+def _identify_pressed(candidates, limit_bus, release_steps):
+    """
+    Find one channel whose switch holds the shared bus active.
+
+    Candidates are backed off one after another (in limit_id order)
+    until the bus releases; the channel whose back-off released the bus
+    is pressed. Channels backed off before it are moved back up, the
+    identified channel stays backed off.
+
+    Returns:
+        the identified PumpChannel, or None if the bus never released.
+    """
+    backed = []
+    found = None
+
+    for ch in candidates:
+        ch.stepper.step(ch.dir_down, release_steps)
+        if not limit_bus.is_any_pressed(debounce=True):
+            found = ch
+            break
+        backed.append(ch)
+
+    # Undo the probe moves of all other channels
+    for ch in backed:
+        ch.stepper.step(ch.dir_up, release_steps)
+
+    return found
+
+
+def home_all(channels, pulse_us: int | None = None) -> list:
+    """
+    Home all channels concurrently on the shared limit bus.
+
+    - all not-yet-homed channels move up together on one pulse train
+    - when the bus trips, every channel stops; the tripped channel is
+      found by backing channels off one at a time until the bus releases
+    - that channel is parked (backed off = homed) and the others resume
+
+    Total time is roughly the longest single stroke plus a short probe
+    per channel, instead of the sum of all strokes.
+
+    pulse_us: homing speed; if None, uses config.DEFAULT_PULSE_US.
+
+    Returns:
+        names of channels that failed to home (empty list on success).
+    """
+    if not channels:
+        return []
+
+    if pulse_us is None:
+        pulse_us = config.DEFAULT_PULSE_US
+    pulse_us = int(pulse_us)
+
+    max_steps = config.HOMING_MAX_STEPS
+    release_steps = config.HOMING_BACKOFF_STEPS
+    if release_steps < 1:
+        release_steps = 1
+
+    limit_bus = channels[0].limit_bus
+    pending = sorted(channels, key=lambda c: c.limit_id)
+    steps_done = {ch.name: 0 for ch in pending}
+    failed = []
+
+    log("Homing (concurrent):", " ".join(ch.name for ch in pending))
+
+    for ch in pending:
+        ch.homed = False
+        ch.busy = True
+
+    try:
+        _home_pending(pending, limit_bus, steps_done, failed, pulse_us, max_steps, release_steps)
+    finally:
+        for ch in channels:
+            ch.busy = False
+
+    for ch in channels:
+        if ch.name in failed:
+            ch.homed = False
+            ch.error |= ERR_HOME_FAILED
+            ch.last_homing_steps = steps_done.get(ch.name, 0)
+
+    return sorted(failed)
+
+
+def _home_pending(pending, limit_bus, steps_done, failed, pulse_us, max_steps, release_steps):
+    """Concurrent homing loop of home_all(); updates steps_done and failed in place."""
+    while pending:
+        # Bus active: find and park the channel that holds it
+        if limit_bus.is_any_pressed(debounce=True):
+            ch = _identify_pressed(pending, limit_bus, release_steps)
+            if ch is None:
+                log("  ERROR: limit bus stays active, cannot identify switch.")
+                failed.extend(c.name for c in pending)
+                break
+
+            pending.remove(ch)
+            ch.mark_homed(steps_done[ch.name])
+            ch.busy = False
+            continue
+
+        # Move all pending channels up together until the bus trips
+        # or the channel with the least travel left reaches max_steps.
+        budget = max_steps - max(steps_done[c.name] for c in pending)
+        group = StepperGroup([c.stepper for c in pending])
+        group.set_directions([c.dir_up for c in pending])
+
+        # The bus was confirmed released above, so the first pulse is safe;
+        # stepping at least once also avoids spinning on a noisy bus.
+        run = 0
+        while run < budget:
+            group.pulse(pulse_us)
+            run += 1
+            if limit_bus.is_any_pressed(debounce=False):
+                break
+
+        for c in pending:
+            steps_done[c.name] += run
+
+        # Drop channels that used up their travel without hitting the limit
+        for c in list(pending):
+            if steps_done[c.name] >= max_steps:
+                log("  ERROR:", c.name, "homing max steps reached without hitting limit.")
+                pending.remove(c)
+                failed.append(c.name)
+
+
+def move_up_guarded(channels, steps: int, pulse_us: int) -> list:
+    """
+    Move all channels up (towards their switches) by the same number of
+    steps while watching the shared limit bus.
+
+    A move that is expected to stop short of the switches can still reach
+    one if the channel lost steps before. When the bus trips, that channel
+    is identified as in home_all(), left backed off and dropped from the
+    move; the other channels finish their steps.
+
+    Returns:
+        names of channels whose switch tripped (all remaining channels
+        if the bus stays active and cannot be resolved).
+    """
+    moving = sorted(channels, key=lambda c: c.limit_id)
+    if not moving or steps <= 0:
+        return []
+
+    limit_bus = moving[0].limit_bus
+    release_steps = config.HOMING_BACKOFF_STEPS
+    if release_steps < 1:
+        release_steps = 1
+    pulse_us = int(pulse_us)
+
+    tripped = []
+    done = 0
+
+    while moving:
+        if limit_bus.is_any_pressed(debounce=True):
+            ch = _identify_pressed(moving, limit_bus, release_steps)
+            if ch is None:
+                log("  ERROR: limit bus stays active, cannot identify switch.")
+                tripped.extend(c.name for c in moving)
+                break
+
+            log("  Limit hit early:", ch.name, "after", done, "of", steps, "steps")
+            moving.remove(ch)
+            tripped.append(ch.name)
+            continue
+
+        if done >= steps:
+            break
+
+        group = StepperGroup([c.stepper for c in moving])
+        group.set_directions([c.dir_up for c in moving])
+
+        # Bus confirmed released above; step at least once (noisy bus)
+        while done < steps:
+            group.pulse(pulse_us)
+            done += 1
+            if limit_bus.is_any_pressed(debounce=False):
+                break
+
+    return sorted(tripped)
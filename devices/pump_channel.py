@@ -1,7 +1,15 @@
+from machine import Pin
 from drivers.stepper_tb6600 import StepperTB6600
 from drivers.mosfet_driver import MosfetDriver
 from drivers.limit_bus import LimitBus
+from drivers.console import log
 import config
+import fixed_point
+import time
+
+
+# Error flags (PumpChannel.error), reported by telemetry
+ERR_HOME_FAILED = 0x01
 
 
 class PumpChannel:
@@ -10,8 +18,37 @@ class PumpChannel:
     - one stepper motor (via TB6600)
     - one valve MOSFET
     - shared limit bus for homing
+
+    The valve driver is created right away, so the valve is driven
+    closed from boot on. PUL and DIR are driven low as plain outputs at
+    boot as well; the stepper driver object is only created on first use.
     """
 
+    __slots__ = (
+        "name",
+        "limit_id",
+        "limit_bus",
+        "dir_up",
+        "dir_down",
+        "steps_per_unit_q",
+        "chunk_units",
+        "position_steps",
+        "position_rem",
+        "homed",
+        "busy",
+        "error",
+        "pulse_us",
+        "valve_open_us",
+        "valve_close_us",
+        "_valve_is_open",
+        "_valve_ready_t",
+        "last_homing_steps",
+        "_dir_pin_num",
+        "_pul_pin_num",
+        "_stepper",
+        "valve",
+    )
+
     def __init__(
         self,
         name: str,
@@ -22,10 +59,13 @@ class PumpChannel:
         limit_id: int,
         dir_up: int | None = None,
         dir_down: int | None = None,
-        steps_per_ml: float | None = None,
+        steps_per_ml: int | float | None = None,
+        pulse_us: int | None = None,
+        valve_open_ms: int | None = None,
+        valve_close_ms: int | None = None,
     ):
         self.name = name
-        self.limit_id = limit_id  # logical id, reserved for future use
+        self.limit_id = limit_id  # logical id, probe order for concurrent homing
         self.limit_bus = limit_bus
 
         # Direction convention for this channel
@@ -38,100 +78,245 @@ class PumpChannel:
         self.dir_up = 1 if dir_up else 0
         self.dir_down = 1 if dir_down else 0
 
-        # Calibration (steps per milliliter)
+        # Calibration (steps per milliliter), integer fixed point:
+        # steps per volume unit in Q20, see fixed_point
         if steps_per_ml is None:
             steps_per_ml = config.DEFAULT_STEPS_PER_ML
-        self.steps_per_ml = float(steps_per_ml)
-
-        # Low-level drivers
-        self.stepper = StepperTB6600(
-            dir_pin_num=dir_pin_num,
-            pul_pin_num=pul_pin_num,
-            default_pulse_us=config.DEFAULT_PULSE_US,
-        )
+        self.steps_per_unit_q = fixed_point.steps_per_unit_q(steps_per_ml)
+        self.chunk_units = fixed_point.chunk_units(self.steps_per_unit_q)
+
+        # Commanded plunger position below home: whole steps plus the
+        # fraction in 1 / STEP_ONE steps. Keeping the fraction makes
+        # cumulative volume exact: rounding error of one dose is carried
+        # into the next one.
+        self.position_steps = 0
+        self.position_rem = fixed_point.STEP_HALF
+
+        # Speed for volume moves (see set_pulse_us / speed profile)
+        self.pulse_us = config.DEFAULT_PULSE_US
+        if pulse_us is not None:
+            self.set_pulse_us(pulse_us)
+
+        # Valve switching latency (see wait_valve_settled)
+        if valve_open_ms is None:
+            valve_open_ms = config.VALVE_OPEN_MS
+        if valve_close_ms is None:
+            valve_close_ms = config.VALVE_CLOSE_MS
+        self.valve_open_us = int(valve_open_ms) * 1000
+        self.valve_close_us = int(valve_close_ms) * 1000
+        self._valve_is_open = False
+        self._valve_ready_t = time.ticks_us()
+
+        # Low-level drivers. Outputs go to their safe level now (valve
+        # closed, no step pulse); StepperTB6600 is created lazily, see
+        # the stepper property.
+        Pin(dir_pin_num, Pin.OUT, value=0)
+        Pin(pul_pin_num, Pin.OUT, value=0)
+        self._dir_pin_num = dir_pin_num
+        self._pul_pin_num = pul_pin_num
+        self._stepper = None
         self.valve = MosfetDriver(pin_num=valve_pin_num, active_high=True)
 
         # Internal state flags
         self.homed = False
+        self.busy = False           # True while this channel is moving
+        self.error = 0              # ERR_* flags
+        self.last_homing_steps = 0  # steps travelled up during the last homing
+
+    # -------- Lazy driver access --------
+
+    @property
+    def stepper(self) -> StepperTB6600:
+        """Stepper driver, configured on first access."""
+        if self._stepper is None:
+            self._stepper = StepperTB6600(
+                dir_pin_num=self._dir_pin_num,
+                pul_pin_num=self._pul_pin_num,
+                default_pulse_us=config.DEFAULT_PULSE_US,
+            )
+        return self._stepper
+
+    # -------- Speed --------
+
+    def set_pulse_us(self, pulse_us: int):
+        """
+        Set the pulse width used for aspirate/dispense moves,
+        clamped to [MIN_PULSE_US, MAX_PULSE_US].
+        """
+        pulse_us = int(pulse_us)
+        if pulse_us < config.MIN_PULSE_US:
+            pulse_us = config.MIN_PULSE_US
+        if pulse_us > config.MAX_PULSE_US:
+            pulse_us = config.MAX_PULSE_US
+        self.pulse_us = pulse_us
 
     # -------- Valve control --------
 
     def open_valve(self):
-        """Open the valve for this channel."""
+        """
+        Open the valve for this channel.
+        Returns immediately; the valve counts as open after valve_open_us.
+        """
+        if self._valve_is_open:
+            return
         self.valve.on()
+        self._valve_is_open = True
+        self._valve_ready_t = time.ticks_add(time.ticks_us(), self.valve_open_us)
 
     def close_valve(self):
-        """Close the valve for this channel."""
+        """
+        Close the valve for this channel.
+        Returns immediately; the valve counts as closed after valve_close_us.
+        """
+        if not self._valve_is_open:
+            return
         self.valve.off()
+        self._valve_is_open = False
+        self._valve_ready_t = time.ticks_add(time.ticks_us(), self.valve_close_us)
+
+    def is_valve_open(self) -> bool:
+        """Commanded valve state (may still be switching)."""
+        return self._valve_is_open
+
+    def valve_settle_us(self) -> int:
+        """Microseconds until the last valve switch has completed (0 if settled)."""
+        remaining = time.ticks_diff(self._valve_ready_t, time.ticks_us())
+        return remaining if remaining > 0 else 0
+
+    def wait_valve_settled(self):
+        """Block until the last valve switch has completed."""
+        remaining = self.valve_settle_us()
+        if remaining > 0:
+            time.sleep_us(remaining)
 
     # -------- Homing logic --------
 
-    def home(self) -> bool:
+    def home(self, pulse_us: int | None = None) -> bool:
         """
         Move the plunger towards the mechanical top until the limit bus is active,
         then back off slightly.
 
+        pulse_us: homing speed; if None, uses config.DEFAULT_PULSE_US.
+                  The number of steps travelled is kept in last_homing_steps.
+
         Returns:
             True  on successful homing
             False if homing failed (no limit detected within max steps)
         """
-        print("Homing:", self.name)
+        self.busy = True
+        try:
+            ok = self._home(pulse_us)
+        finally:
+            self.busy = False
+
+        if not ok:
+            self.error |= ERR_HOME_FAILED
+        return ok
+
+    def _home(self, pulse_us: int | None) -> bool:
+        log("Homing:", self.name)
 
         max_steps = config.HOMING_MAX_STEPS
         backoff_steps = config.HOMING_BACKOFF_STEPS
 
-        # Use default speed for homing (can be adjusted later if needed)
-        self.stepper.set_default_pulse_us(config.DEFAULT_PULSE_US)
+        # Local reference to the lazily created driver
+        stepper = self.stepper
 
-        steps_done = 0
+        # Use default speed for homing unless a specific speed is requested
+        if pulse_us is None:
+            pulse_us = config.DEFAULT_PULSE_US
+        stepper.set_default_pulse_us(pulse_us)
 
         # Safety: if the bus is already pressed, we can either back off first
         # or treat it as already at the limit. For now we try to move away
         # a little if active at start.
         if self.limit_bus.is_any_pressed(debounce=True):
-            print("  Warning:", self.name, "limit bus already active at start of homing.")
+            log("  Warning:", self.name, "limit bus already active at start of homing.")
             # Optional: small move away from limit before going up again
             # self.stepper.step(self.dir_down, backoff_steps)
 
         # Move towards the limit (UP) step-by-step,
-        # checking the shared bus after each step.
-        while not self.limit_bus.is_any_pressed(debounce=False):
-            self.stepper.step(self.dir_up, 1)
-            steps_done += 1
+        # checking the shared bus (raw) before each step.
+        # Runs in the fastest available hot loop, see drivers/fast_path.py.
+        steps_done = stepper.step_until_active(self.dir_up, self.limit_bus, max_steps)
+        self.last_homing_steps = steps_done
 
-            if steps_done >= max_steps:
-                print("  ERROR:", self.name, "homing max steps reached without hitting limit.")
-                self.homed = False
-                return False
+        if steps_done >= max_steps:
+            log("  ERROR:", self.name, "homing max steps reached without hitting limit.")
+            self.homed = False
+            return False
 
         # Confirm with debounce that the bus is really active
         if not self.limit_bus.is_any_pressed(debounce=True):
-            print("  ERROR:", self.name, "limit signal not stable during homing.")
+            log("  ERROR:", self.name, "limit signal not stable during homing.")
             self.homed = False
             return False
 
         # Small backoff in the opposite direction to release mechanical stress
         if backoff_steps > 0:
-            self.stepper.step(self.dir_down, backoff_steps)
+            stepper.step(self.dir_down, backoff_steps)
 
-        self.homed = True
-        print("  Homing OK for", self.name, "- steps taken:", steps_done)
+        self.mark_homed(steps_done)
         return True
 
+    def mark_homed(self, steps_done: int):
+        """
+        Record a successful homing: the plunger is backed off from the
+        limit and becomes the zero position for volume moves.
+        """
+        self.last_homing_steps = steps_done
+        self.homed = True
+        self.position_steps = 0
+        self.position_rem = fixed_point.STEP_HALF
+        self.error &= ~ERR_HOME_FAILED
+        log("  Homing OK for", self.name, "- steps taken:", steps_done)
+
     # -------- Volume-based moves --------
 
-    def _volume_to_steps(self, volume_ml: float) -> int:
+    def _move_to_steps(self, delta_units: int) -> int:
         """
-        Convert volume in milliliters to a whole number of motor steps.
+        Advance the commanded position by delta_units (signed volume)
+        and return the number of whole steps to perform now.
         """
-        steps = int(round(volume_ml * self.steps_per_ml))
+        old = self.position_steps
+        self.position_steps, self.position_rem = fixed_point.advance(
+            old, self.position_rem, delta_units, self.steps_per_unit_q, self.chunk_units
+        )
+        steps = self.position_steps - old
         if steps < 0:
             steps = -steps  # ensure non-negative; direction is handled separately
         return steps
 
-    def aspirate_ml(self, volume_ml: float) -> int:
+    def plan_move(self, volume_units: int, dispense: bool) -> tuple:
+        """
+        Commit a volume move to the commanded position without moving.
+
+        Returns:
+            (direction, steps) to be executed by the caller
+            (used by ValveScheduler to split moves around valve switching).
         """
-        Pull the plunger to aspirate a given volume in ml.
+        if dispense:
+            return self.dir_up, self._move_to_steps(-volume_units)
+        return self.dir_down, self._move_to_steps(volume_units)
+
+    def _run_move(self, direction: int, steps: int):
+        """
+        Execute a planned move. DIR is written first so its setup time
+        overlaps with a valve that is still switching; the first pulse is
+        issued as soon as the valve state is settled.
+        """
+        stepper = self.stepper
+        self.busy = True
+        try:
+            stepper.set_direction(direction)
+            self.wait_valve_settled()
+            stepper.step(direction, steps, self.pulse_us)
+        finally:
+            self.busy = False
+
+    def aspirate_units(self, volume_units: int) -> int:
+        """
+        Pull the plunger to aspirate a given volume in volume units (0.1 ul).
 
         By default we assume:
         - "aspirate" = move AWAY from the homing limit (dir_down).
@@ -141,17 +326,17 @@ class PumpChannel:
         Returns:
             number of steps actually performed.
         """
-        if volume_ml <= 0:
+        if volume_units <= 0:
             return 0
 
-        steps = self._volume_to_steps(volume_ml)
-        print("Aspirate:", self.name, "volume_ml =", volume_ml, "steps =", steps)
-        self.stepper.step(self.dir_down, steps)
+        direction, steps = self.plan_move(volume_units, dispense=False)
+        log("Aspirate:", self.name, "volume_ml =", fixed_point.format_ml(volume_units), "steps =", steps)
+        self._run_move(direction, steps)
         return steps
 
-    def dispense_ml(self, volume_ml: float) -> int:
+    def dispense_units(self, volume_units: int) -> int:
         """
-        Push the plunger to dispense a given volume in ml.
+        Push the plunger to dispense a given volume in volume units (0.1 ul).
 
         By default we assume:
         - "dispense" = move TOWARDS the homing limit (dir_up).
@@ -159,10 +344,18 @@ class PumpChannel:
         Returns:
             number of steps actually performed.
         """
-        if volume_ml <= 0:
+        if volume_units <= 0:
             return 0
 
-        steps = self._volume_to_steps(volume_ml)
-        print("Dispense:", self.name, "volume_ml =", volume_ml, "steps =", steps)
-        self.stepper.step(self.dir_up, steps)
+        direction, steps = self.plan_move(volume_units, dispense=True)
+        log("Dispense:", self.name, "volume_ml =", fixed_point.format_ml(volume_units), "steps =", steps)
+        self._run_move(direction, steps)
         return steps
+
+    def aspirate_ml(self, volume_ml: float) -> int:
+        """Aspirate a volume given in ml (see aspirate_units)."""
+        return self.aspirate_units(fixed_point.ml_to_units(volume_ml))
+
+    def dispense_ml(self, volume_ml: float) -> int:
+        """Dispense a volume given in ml (see dispense_units)."""
+        return self.dispense_units(fixed_point.ml_to_units(volume_ml))
@@ -0,0 +1,50 @@
+import json
+import config
+
+
+def load(path: str | None = None) -> dict:
+    """
+    Read the per-channel speed profile ({"CH1": pulse_us, ...}).
+    Returns an empty dict if the file does not exist or is invalid.
+    """
+    if path is None:
+        path = config.SPEED_PROFILE_FILE
+
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(profile, dict):
+        return {}
+    return profile
+
+
+def save(profile: dict, path: str | None = None):
+    """Write the per-channel speed profile."""
+    if path is None:
+        path = config.SPEED_PROFILE_FILE
+
+    with open(path, "w") as f:
+        json.dump(profile, f)
+
+
+def apply(channels, profile: dict | None = None) -> int:
+    """
+    Set move speed of every channel listed in the profile.
+
+    Returns:
+        number of channels updated.
+    """
+    if profile is None:
+        profile = load()
+
+    updated = 0
+    for ch in channels:
+        pulse_us = profile.get(ch.name)
+        if pulse_us is None:
+            continue
+        ch.set_pulse_us(pulse_us)
+        updated += 1
+    return updated
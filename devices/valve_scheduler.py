@@ -0,0 +1,116 @@
+import fixed_point
+from drivers.console import log
+
+
+class ValveScheduler:
+    """
+    Runs a sequence of valve-gated moves without fixed dead time.
+
+    For every move:
+    - the channel valve is opened (if not already) and DIR is written
+      right away, so DIR setup overlaps with valve settling
+    - the first step pulse is issued as soon as the valve is known to be
+      open (PumpChannel.valve_open_us after the MOSFET edge)
+    - if the next move uses another channel, its valve is switched on
+      while the current move is still running, timed so that it is
+      settled when the current move ends
+    - the valve is closed right after its move; closing overlaps with
+      the next move
+
+    Switching latencies come from config.VALVE_OPEN_MS / VALVE_CLOSE_MS
+    (per-channel "valve_open_ms" / "valve_close_ms").
+    """
+
+    __slots__ = ("wait_closed",)
+
+    def __init__(self, wait_closed: bool = True):
+        """
+        wait_closed: if True, run() returns only after the last valve
+                     is fully closed.
+        """
+        self.wait_closed = wait_closed
+
+    @staticmethod
+    def _lead_steps(ch, next_ch, steps: int) -> int:
+        """Steps before the end of the current move at which next_ch's valve is opened."""
+        period_us = 2 * ch.pulse_us
+        lead = (next_ch.valve_open_us + period_us - 1) // period_us
+        return lead if lead < steps else steps
+
+    @staticmethod
+    def _open(ch, opened):
+        """Open ch's valve, remembering it if this call switched it on."""
+        if not ch.is_valve_open():
+            ch.open_valve()
+            opened.append(ch)
+
+    def run(self, ops) -> int:
+        """
+        Execute moves in order.
+
+        ops: sequence of (channel, dispense, volume_units):
+             dispense=True pushes the plunger, False aspirates.
+             Moves with volume_units <= 0 are skipped.
+
+        Each move is committed to the channel position (plan_move) right
+        before it runs, so a move that never starts leaves the position
+        untouched. Every valve opened here is closed again, also when a
+        move is interrupted.
+
+        Returns:
+            total number of steps performed.
+        """
+        moves = [op for op in ops if op[2] > 0]
+        if not moves:
+            return 0
+
+        total = 0
+        n = len(moves)
+        opened = []
+        try:
+            for i in range(n):
+                ch, dispense, volume_units = moves[i]
+                stepper = ch.stepper
+                ch.busy = True
+
+                direction, steps = ch.plan_move(volume_units, dispense)
+                log(
+                    "Dispense:" if dispense else "Aspirate:", ch.name,
+                    "volume_ml =", fixed_point.format_ml(volume_units), "steps =", steps,
+                )
+
+                self._open(ch, opened)  # no-op if it was pre-switched by the previous move
+                stepper.set_direction(direction)
+                ch.wait_valve_settled()
+
+                next_ch = moves[i + 1][0] if i + 1 < n else None
+
+                if next_ch is None or next_ch is ch:
+                    stepper.step(direction, steps, ch.pulse_us)
+                    if next_ch is None:
+                        ch.close_valve()
+                else:
+                    lead = self._lead_steps(ch, next_ch, steps)
+                    stepper.step(direction, steps - lead, ch.pulse_us)
+
+                    # Pre-switch the next valve and DIR while this move finishes
+                    self._open(next_ch, opened)
+                    next_dir = next_ch.dir_up if moves[i + 1][1] else next_ch.dir_down
+                    next_ch.stepper.set_direction(next_dir)
+
+                    stepper.step(direction, lead, ch.pulse_us)
+                    ch.close_valve()
+
+                total += steps
+                if next_ch is not ch:
+                    ch.busy = False
+        finally:
+            for ch in opened:
+                ch.close_valve()  # no-op for valves already closed
+            for ch, _, _ in moves:
+                ch.busy = False
+
+        if self.wait_closed:
+            moves[-1][0].wait_valve_settled()
+
+        return total
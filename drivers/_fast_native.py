@@ -0,0 +1,42 @@
+"""
+Native-emitter hot loops (see drivers/fast_path.py).
+
+Same algorithms as the pure-Python versions in the drivers, compiled to
+machine code. Uses the normal Pin API, so it works on every port with
+the native emitter. Imported on MicroPython only.
+"""
+
+import micropython
+import time
+
+
+@micropython.native
+def pulse_train(pul, steps: int, half_us: int):
+    """Generate steps pulses (HIGH half_us, LOW half_us) on pin pul."""
+    value = pul.value
+    sleep_us = time.sleep_us
+    for _ in range(steps):
+        value(1)
+        sleep_us(half_us)
+        value(0)
+        sleep_us(half_us)
+
+
+@micropython.native
+def pulse_until(pul, is_active, max_steps: int, half_us: int) -> int:
+    """
+    Step until is_active() is True, checked before every step, or until
+    max_steps steps are done. Returns the steps performed.
+    """
+    value = pul.value
+    sleep_us = time.sleep_us
+    done = 0
+    while done < max_steps:
+        if is_active():
+            return done
+        value(1)
+        sleep_us(half_us)
+        value(0)
+        sleep_us(half_us)
+        done += 1
+    return done
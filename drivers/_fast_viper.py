@@ -0,0 +1,73 @@
+"""
+Viper hot loops for the RP2040 (see drivers/fast_path.py).
+
+Pins are accessed through the SIO registers and timing uses the
+free-running 1 MHz TIMER, so no Python calls happen inside the loops.
+The pins must already be configured by machine.Pin (SIO function).
+Imported on MicroPython/RP2040 only.
+"""
+
+import micropython
+
+# RP2040 register addresses
+#   SIO_BASE   0xD0000000: GPIO_IN +0x04, GPIO_OUT_SET +0x14, GPIO_OUT_CLR +0x18
+#   TIMER_BASE 0x40054000: TIMERAWL +0x28 (raw low word, microseconds)
+
+
+@micropython.viper
+def pulse_train(pul_mask: int, steps: int, half_us: int):
+    """Generate steps pulses (HIGH half_us, LOW half_us) on the pins in pul_mask."""
+    out_set = ptr32(0xD0000014)
+    out_clr = ptr32(0xD0000018)
+    timer = ptr32(0x40054028)
+
+    t = int(timer[0])
+    while steps > 0:
+        out_set[0] = pul_mask
+        t += half_us
+        while int(timer[0]) - t < 0:
+            pass
+
+        out_clr[0] = pul_mask
+        t += half_us
+        while int(timer[0]) - t < 0:
+            pass
+
+        steps -= 1
+
+
+@micropython.viper
+def pulse_until(pul_mask: int, in_mask: int, active_bits: int, max_steps: int, half_us: int) -> int:
+    """
+    Step until (GPIO_IN & in_mask) == active_bits, checked before every
+    step, or until max_steps steps are done. Returns the steps performed.
+    """
+    gpio_in = ptr32(0xD0000004)
+    out_set = ptr32(0xD0000014)
+    out_clr = ptr32(0xD0000018)
+    timer = ptr32(0x40054028)
+
+    done = 0
+    t = int(timer[0])
+    while done < max_steps:
+        if (int(gpio_in[0]) & in_mask) == active_bits:
+            return done
+
+        out_set[0] = pul_mask
+        t += half_us
+        while int(timer[0]) - t < 0:
+            pass
+
+        out_clr[0] = pul_mask
+        t += half_us
+        while int(timer[0]) - t < 0:
+            pass
+
+        done += 1
+    return done
+
+
+@micropython.viper
+def gpio_in(mask: int) -> int:
+    """Return GPIO_IN & mask."""
+    return int(ptr32(0xD0000004)[0]) & mask
@@ -0,0 +1,24 @@
+"""
+Shared USB console (stdout).
+
+Device debug messages and the reply / telemetry lines of StdioTransport
+all go to the same stdout. Telemetry frames may be printed from the
+second core, so every console write goes through one lock here; a print()
+of several arguments is then never split by another line.
+"""
+
+from drivers.thread_lock import new_lock
+
+_lock = new_lock()
+
+
+def log(*args):
+    """Debug output; same arguments as print()."""
+    with _lock:
+        print(*args)
+
+
+def write_line(msg: str):
+    """Protocol line (reply or telemetry frame)."""
+    with _lock:
+        print(msg)
@@ -0,0 +1,74 @@
+"""
+Selection of the hot-loop implementation.
+
+Three variants exist for the innermost loops (step pulse train,
+step-and-poll homing loop, limit bus read):
+- "viper":  drivers/_fast_viper.py, @micropython.viper with direct SIO /
+            TIMER register access (RP2040 only)
+- "native": drivers/_fast_native.py, @micropython.native machine code
+            using the normal Pin API
+- "python": plain bytecode in the drivers themselves; always available
+            and the only variant on CPython / host tests
+
+config.FAST_PATH picks one ("auto" = fastest available). The choice is
+made once at import time; modes/mode_bench_step.py compares all
+available variants.
+"""
+
+import sys
+import config
+
+VIPER = "viper"
+NATIVE = "native"
+PYTHON = "python"
+
+viper = None
+native = None
+
+
+def _is_rp2040() -> bool:
+    if sys.platform != "rp2":
+        return False
+    return "RP2040" in getattr(sys.implementation, "_machine", "")
+
+
+if sys.implementation.name == "micropython":
+    # Emitters may be disabled in the firmware build; compiling the
+    # decorated functions then fails and the variant is skipped.
+    try:
+        from drivers import _fast_native as native
+    except Exception:
+        native = None
+
+    if _is_rp2040():
+        try:
+            from drivers import _fast_viper as viper
+        except Exception:
+            viper = None
+
+
+def available() -> list:
+    """Variants usable on this board, fastest first."""
+    kinds = []
+    if viper is not None:
+        kinds.append(VIPER)
+    if native is not None:
+        kinds.append(NATIVE)
+    kinds.append(PYTHON)
+    return kinds
+
+
+def select(preferred: str = "auto") -> str:
+    """
+    Return the variant to use for a preference
+    ("auto", "viper", "native" or "python"), falling back to the next
+    slower variant if the preferred one is not available.
+    """
+    if preferred in ("auto", VIPER) and viper is not None:
+        return VIPER
+    if preferred in ("auto", VIPER, NATIVE) and native is not None:
+        return NATIVE
+    return PYTHON
+
+
+MODE = select(config.FAST_PATH)
@@ -1,6 +1,10 @@
 from machine import Pin
 import time
 import config
+from drivers import fast_path
+
+# Limit bus read selected once at import (see drivers/fast_path.py)
+_USE_VIPER = fast_path.MODE == fast_path.VIPER
 
 
 class LimitBus:
@@ -16,6 +20,8 @@ class LimitBus:
     - Active level (low or high) is configured in config.LIMIT_BUS_ACTIVE_LOW.
     """
 
+    __slots__ = ("pin", "active_low", "debounce_ms", "in_mask", "active_bits")
+
     def __init__(
         self,
         pin_num: int | None = None,
@@ -51,6 +57,10 @@ class LimitBus:
         self.active_low = active_low
         self.debounce_ms = int(debounce_ms)
 
+        # For direct register access: GPIO_IN & in_mask == active_bits
+        self.in_mask = 1 << pin_num
+        self.active_bits = 0 if active_low else self.in_mask
+
     # ---------- Low-level reading helpers ----------
 
     def _raw_level(self) -> int:
@@ -67,6 +77,9 @@ class LimitBus:
         "Active" means that at least one limit switch is pressed,
         according to the active_low flag.
         """
+        if _USE_VIPER:
+            return fast_path.viper.gpio_in(self.in_mask) == self.active_bits
+
         level = self._raw_level()
         if self.active_low:
             # Active when pin is pulled low (0)
@@ -4,6 +4,8 @@ from machine import Pin
 class MosfetDriver:
     """Simple on/off driver for a MOSFET-controlled load (e.g. valve)."""
 
+    __slots__ = ("pin", "active_high")
+
     def __init__(self, pin_num: int, active_high: bool = True):
         self.pin = Pin(pin_num, Pin.OUT, value=0 if active_high else 1)
         self.active_high = active_high
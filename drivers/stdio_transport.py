@@ -0,0 +1,42 @@
+import sys
+from drivers import console
+
+
+class StdioTransport:
+    """
+    Command transport over the USB REPL (sys.stdin / print).
+
+    Simplest option for early integration. Note that REPL stdin is shared
+    with debug output and Ctrl-C handling; see UartTransport for a
+    dedicated link. Output goes through drivers/console.py, whose lock
+    keeps replies, telemetry frames and debug lines from interleaving.
+    """
+
+    __slots__ = ()
+
+    # How long the control loop sleeps after an empty read
+    IDLE_MS = 10
+
+    # Receive errors (see UartTransport); never returned by stdin
+    LINE_TOO_LONG = "ERR LINE_TOO_LONG"
+    RX_OVERFLOW = "ERR RX_OVERFLOW"
+
+    def readline(self) -> str | None:
+        """
+        Return one command line, or None if nothing was received.
+        Blocks until a full line is received.
+        """
+        line = sys.stdin.readline()
+        return line if line else None
+
+    def write_line(self, msg: str):
+        """Send one reply line."""
+        console.write_line(msg)
+
+    def flush(self):
+        """Replies are written immediately; nothing to flush."""
+        pass
+
+    def rx_pending(self) -> int:
+        """Number of received bytes not yet consumed (unknown for stdin)."""
+        return 0
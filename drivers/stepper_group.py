@@ -0,0 +1,62 @@
+import time
+from drivers.stepper_tb6600 import StepperTB6600
+
+
+class StepperGroup:
+    """
+    Drives several StepperTB6600 channels with one shared pulse train.
+
+    All steppers in the group get their rising and falling PUL edges in the
+    same loop iteration, so N channels move together in the time one channel
+    needs for the same number of steps.
+
+    Like StepperTB6600, this class does not know anything about limits,
+    directions in the physical sense or volumes.
+    """
+
+    __slots__ = ("steppers",)
+
+    def __init__(self, steppers):
+        """
+        steppers: list of StepperTB6600 instances.
+        """
+        self.steppers = list(steppers)
+
+    def set_directions(self, directions):
+        """
+        Write DIR for every stepper (same order as self.steppers)
+        and let the drivers settle.
+        """
+        for stepper, direction in zip(self.steppers, directions):
+            stepper.set_direction(direction)
+        time.sleep_us(StepperTB6600.DIR_SETUP_US)
+
+    def pulse(self, pulse_us):
+        """
+        Perform exactly one step on every stepper of the group.
+        DIR must already be set (see set_directions()).
+        """
+        for stepper in self.steppers:
+            stepper.pul.value(1)
+        time.sleep_us(pulse_us)
+
+        for stepper in self.steppers:
+            stepper.pul.value(0)
+        time.sleep_us(pulse_us)
+
+    def step(self, directions, steps, pulse_us):
+        """
+        Move all steppers by the same number of steps at constant speed.
+
+        directions: DIR value per stepper (same order as self.steppers).
+        steps: positive integer number of steps.
+        pulse_us: pulse width (HIGH and LOW half-period).
+        """
+        if steps <= 0 or not self.steppers:
+            return
+
+        pulse_us = int(pulse_us)
+        self.set_directions(directions)
+
+        for _ in range(steps):
+            self.pulse(pulse_us)
@@ -1,5 +1,50 @@
 from machine import Pin
 import time
+import config
+from drivers import fast_path
+
+
+def pulse_train_py(pul, steps, half_us):
+    """Pure-Python pulse loop (fallback for fast_path)."""
+    for _ in range(steps):
+        # Rising edge
+        pul.value(1)
+        time.sleep_us(half_us)
+
+        # Falling edge
+        pul.value(0)
+        time.sleep_us(half_us)
+
+
+def pulse_until_py(pul, is_active, max_steps, half_us):
+    """
+    Pure-Python step-and-poll loop (fallback for fast_path).
+    Checks is_active() before every step; returns the steps performed.
+    """
+    done = 0
+    while done < max_steps:
+        if is_active():
+            return done
+        pul.value(1)
+        time.sleep_us(half_us)
+        pul.value(0)
+        time.sleep_us(half_us)
+        done += 1
+    return done
+
+
+# Hot loops selected once at import (see drivers/fast_path.py).
+# The viper variant takes pin masks, the others take Pin objects.
+# viper/native loops do not check for KeyboardInterrupt or run scheduled
+# soft IRQs, so they are called in chunks of at most _CHUNK steps.
+_CHUNK = config.FAST_PATH_CHUNK_STEPS
+_USE_VIPER = fast_path.MODE == fast_path.VIPER
+if fast_path.MODE == fast_path.NATIVE:
+    _pulse_train = fast_path.native.pulse_train
+    _pulse_until = fast_path.native.pulse_until
+else:
+    _pulse_train = pulse_train_py
+    _pulse_until = pulse_until_py
 
 
 class StepperTB6600:
@@ -19,6 +64,11 @@ class StepperTB6600:
     are handled by higher-level code (e.g. PumpChannel).
     """
 
+    __slots__ = ("dir", "pul", "pul_mask", "default_pulse_us", "_dir_level", "_dir_t")
+
+    # Minimum time between a DIR change and the first PUL edge
+    DIR_SETUP_US = 50
+
     def __init__(self, dir_pin_num, pul_pin_num, default_pulse_us):
         """
         dir_pin_num: GPIO number used for DIR+ on TB6600.
@@ -28,10 +78,15 @@ class StepperTB6600:
         # Configure direction and pulse pins
         self.dir = Pin(dir_pin_num, Pin.OUT, value=0)
         self.pul = Pin(pul_pin_num, Pin.OUT, value=0)
+        self.pul_mask = 1 << pul_pin_num  # for direct register access
 
         # Default pulse length (HIGH or LOW half-period)
         self.default_pulse_us = int(default_pulse_us)
 
+        # Current DIR level and the time it was last changed
+        self._dir_level = 0
+        self._dir_t = time.ticks_us()
+
     def set_default_pulse_us(self, pulse_us):
         """
         Update the default pulse width (speed).
@@ -40,6 +95,19 @@ class StepperTB6600:
         """
         self.default_pulse_us = int(pulse_us)
 
+    def set_direction(self, direction):
+        """
+        Write DIR without waiting.
+
+        Lets callers set the direction early (e.g. while a valve settles);
+        step() then only waits for whatever is left of DIR_SETUP_US.
+        """
+        level = 1 if direction else 0
+        if level != self._dir_level:
+            self.dir.value(level)
+            self._dir_level = level
+            self._dir_t = time.ticks_us()
+
     def step(self, direction, steps, pulse_us=None):
         """
         Perform a given number of steps at constant speed.
@@ -50,7 +118,7 @@ class StepperTB6600:
         pulse_us: custom pulse width; if None, uses self.default_pulse_us.
 
         One full step is:
-        - set DIR
+        - set DIR (setup time only waited if DIR actually changed recently)
         - PUL HIGH for pulse_us
         - PUL LOW  for pulse_us
         """
@@ -63,15 +131,58 @@ class StepperTB6600:
         pulse_us = int(pulse_us)
 
         # Set direction and let it settle a bit
-        self.dir.value(1 if direction else 0)
-        time.sleep_us(50)  # small setup time for DIR
-
-        # Generate "steps" pulses
-        for _ in range(steps):
-            # Rising edge
-            self.pul.value(1)
-            time.sleep_us(pulse_us)
-
-            # Falling edge
-            self.pul.value(0)
-            time.sleep_us(pulse_us)
+        self._prepare_direction(direction)
+
+        # Generate "steps" pulses, one chunk at a time
+        if _USE_VIPER:
+            train = fast_path.viper.pulse_train
+            pin = self.pul_mask
+        else:
+            train = _pulse_train
+            pin = self.pul
+        while steps > 0:
+            n = steps if steps < _CHUNK else _CHUNK
+            train(pin, n, pulse_us)
+            steps -= n
+
+    def step_until_active(self, direction, limit_bus, max_steps, pulse_us=None):
+        """
+        Step until the limit bus is active (raw, checked before every step)
+        or max_steps steps are done.
+
+        Returns:
+            number of steps performed; max_steps means the bus never
+            became active.
+        """
+        if max_steps <= 0:
+            return 0
+
+        if pulse_us is None:
+            pulse_us = self.default_pulse_us
+        pulse_us = int(pulse_us)
+
+        self._prepare_direction(direction)
+
+        done = 0
+        while done < max_steps:
+            n = max_steps - done
+            if n > _CHUNK:
+                n = _CHUNK
+            if _USE_VIPER:
+                k = fast_path.viper.pulse_until(
+                    self.pul_mask, limit_bus.in_mask, limit_bus.active_bits, n, pulse_us
+                )
+            else:
+                k = _pulse_until(self.pul, limit_bus.is_active_raw, n, pulse_us)
+            done += k
+            if k < n:
+                # Bus became active
+                break
+        return done
+
+    def _prepare_direction(self, direction):
+        """Set DIR and wait for what is left of the DIR setup time."""
+        self.set_direction(direction)
+        wait_us = self.DIR_SETUP_US - time.ticks_diff(time.ticks_us(), self._dir_t)
+        if wait_us > 0:
+            time.sleep_us(wait_us)
@@ -0,0 +1,23 @@
+class _NoLock:
+    """Stand-in lock for firmware/hosts without _thread."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def new_lock():
+    """
+    Lock for data shared between the two cores (e.g. a transport used by
+    the control loop and the telemetry thread).
+    Falls back to a no-op lock when _thread is not available.
+    """
+    try:
+        import _thread
+    except ImportError:
+        return _NoLock()
+    return _thread.allocate_lock()
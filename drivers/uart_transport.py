@@ -0,0 +1,300 @@
+from machine import UART, Pin
+from drivers.thread_lock import new_lock
+import config
+
+
+class UartTransport:
+    """
+    Command transport over a dedicated machine.UART port.
+
+    Receive path:
+    - the UART driver fills its C-level receive buffer (rxbuf) from the
+      hardware interrupt, so input is not lost while the CPU is busy in
+      long step loops (soft IRQs do not run there)
+    - the UART RX soft IRQ moves those bytes into a preallocated ring
+      buffer whenever the VM gets to run it; when the ring is full the
+      bytes stay in rxbuf until readline() has made room
+    - readline() assembles complete lines from the ring buffer into a
+      preallocated line buffer (no allocation until the line is complete)
+    - a line that could not be received intact (longer than line_max, or
+      hit by an rxbuf overflow) is discarded up to its '\n' and reported
+      as LINE_TOO_LONG / RX_OVERFLOW instead, so the host always gets a reply
+
+    Transmit path:
+    - write_line() appends replies to a preallocated TX buffer
+    - flush() sends the whole buffer with one UART write
+
+    If the firmware has no UART.irq() support, the ring buffer is filled
+    from readline() instead (polling).
+    """
+
+    __slots__ = (
+        "uart",
+        "irq_enabled",
+        "overflows",
+        "dropped_lines",
+        "_rx_lost",
+        "_rx_stalled",
+        "_filling",
+        "_rxbuf_size",
+        "_ring",
+        "_mask",
+        "_head",
+        "_tail",
+        "_chunk",
+        "_line",
+        "_line_len",
+        "_line_skip",
+        "_tx",
+        "_tx_mv",
+        "_tx_len",
+        "_tx_lock",
+        "_rx_handler",
+    )
+
+    # How long the control loop sleeps after an empty read
+    IDLE_MS = 1
+
+    # Returned by readline() in place of a discarded line
+    LINE_TOO_LONG = "ERR LINE_TOO_LONG"
+    RX_OVERFLOW = "ERR RX_OVERFLOW"
+
+    def __init__(
+        self,
+        uart_id: int | None = None,
+        baudrate: int | None = None,
+        tx_pin: int | None = None,
+        rx_pin: int | None = None,
+        rx_ring_size: int | None = None,
+        rxbuf_size: int | None = None,
+        line_max: int | None = None,
+        tx_buffer_size: int | None = None,
+    ):
+        """
+        All parameters default to the UART_* values in config.
+        rx_ring_size must be a power of two larger than rxbuf_size, so the
+        ring can always take everything rxbuf holds.
+        """
+        if uart_id is None:
+            uart_id = config.UART_ID
+        if baudrate is None:
+            baudrate = config.UART_BAUDRATE
+        if tx_pin is None:
+            tx_pin = config.UART_TX_PIN
+        if rx_pin is None:
+            rx_pin = config.UART_RX_PIN
+        if rx_ring_size is None:
+            rx_ring_size = config.UART_RX_RING_SIZE
+        if rxbuf_size is None:
+            rxbuf_size = config.UART_RXBUF_SIZE
+        if line_max is None:
+            line_max = config.UART_LINE_MAX
+        if tx_buffer_size is None:
+            tx_buffer_size = config.UART_TX_BUFFER_SIZE
+
+        if rx_ring_size <= 0 or rx_ring_size & (rx_ring_size - 1):
+            raise ValueError("rx_ring_size must be a power of two")
+        if rx_ring_size <= rxbuf_size:
+            raise ValueError("rx_ring_size must be larger than rxbuf_size")
+
+        self.uart = UART(
+            uart_id,
+            baudrate=baudrate,
+            tx=Pin(tx_pin),
+            rx=Pin(rx_pin),
+            rxbuf=rxbuf_size,
+        )
+
+        # Receive ring buffer: head is written by the IRQ, tail by readline()
+        self._ring = bytearray(rx_ring_size)
+        self._mask = rx_ring_size - 1
+        self._head = 0
+        self._tail = 0
+        self._chunk = bytearray(32)
+        self._rxbuf_size = rxbuf_size
+        # Set when rxbuf overflowed; input is dropped until readline()
+        # has drained the ring and discarded the damaged line
+        self._rx_lost = False
+        # Set when _fill() stopped on a full ring with input left in rxbuf
+        self._rx_stalled = False
+        # Set while _fill() runs from readline(), so the IRQ does not
+        # move head underneath it
+        self._filling = False
+
+        # Line assembly; _line_skip is the error reply for a line being
+        # discarded up to its '\n', or None
+        self._line = bytearray(line_max)
+        self._line_len = 0
+        self._line_skip = None
+
+        # Buffered writer
+        self._tx = bytearray(tx_buffer_size)
+        self._tx_mv = memoryview(self._tx)
+        self._tx_len = 0
+        # Replies and telemetry frames may come from different cores
+        self._tx_lock = new_lock()
+
+        # Diagnostics
+        self.overflows = 0       # bytes dropped after rxbuf overflowed
+        self.dropped_lines = 0   # lines discarded (too long or hit by an overflow)
+
+        # Bound method is created once here; creating it inside the IRQ would allocate
+        self._rx_handler = self._on_rx
+        try:
+            self.uart.irq(handler=self._rx_handler, trigger=UART.IRQ_RXIDLE)
+            self.irq_enabled = True
+        except (AttributeError, ValueError, TypeError):
+            self.irq_enabled = False
+
+    # ---------- Receive ----------
+
+    def _on_rx(self, _uart):
+        """UART RX interrupt handler."""
+        if not self._filling:
+            self._fill()
+
+    def _fill(self):
+        """
+        Move the bytes waiting in the UART buffer into the ring buffer,
+        as far as the ring has room. Does not allocate.
+
+        What does not fit stays in rxbuf. Input only counts as lost when
+        rxbuf itself is found full (the driver drops bytes from then on);
+        the rest of the input is then dropped until readline() has caught
+        up, so the bytes in the ring never skip over a gap.
+        """
+        uart = self.uart
+        chunk = self._chunk
+        chunk_size = len(chunk)
+        ring = self._ring
+        mask = self._mask
+        stalled = False
+
+        self._filling = True
+        while True:
+            if self._rx_lost:
+                n = uart.readinto(chunk)
+                if not n:
+                    break
+                self.overflows += n
+                continue
+
+            if uart.any() >= self._rxbuf_size:
+                self._rx_lost = True
+                continue
+
+            head = self._head
+            free = (self._tail - head - 1) & mask
+            if not free:
+                stalled = True
+                break
+
+            n = uart.readinto(chunk, free if free < chunk_size else chunk_size)
+            if not n:
+                break
+            for i in range(n):
+                ring[head] = chunk[i]
+                head = (head + 1) & mask
+            self._head = head
+
+        self._rx_stalled = stalled
+        self._filling = False
+
+    def rx_pending(self) -> int:
+        """Number of received bytes not yet consumed."""
+        return (self._head - self._tail) & self._mask
+
+    def readline(self) -> str | None:
+        """
+        Return one complete command line (without line ending),
+        or None if no complete line is available yet. Never blocks.
+
+        Returns LINE_TOO_LONG or RX_OVERFLOW (compare with "is") when
+        a line had to be discarded.
+        """
+        if not self.irq_enabled or self._rx_stalled:
+            self._fill()
+
+        ring = self._ring
+        mask = self._mask
+        line = self._line
+        line_max = len(line)
+        tail = self._tail
+
+        while True:
+            head = self._head
+            while tail != head:
+                b = ring[tail]
+                tail = (tail + 1) & mask
+
+                if b == 0x0A:  # '\n' terminates a line
+                    self._tail = tail
+                    n = self._line_len
+                    self._line_len = 0
+                    error = self._line_skip
+                    if error is not None:
+                        self._line_skip = None
+                        self.dropped_lines += 1
+                        return error
+                    return str(line[:n], "utf-8")
+
+                if b == 0x0D or self._line_skip is not None:  # ignore '\r' and discarded tails
+                    continue
+
+                if self._line_len >= line_max:
+                    self._line_skip = self.LINE_TOO_LONG
+                    continue
+
+                line[self._line_len] = b
+                self._line_len += 1
+
+            self._tail = tail
+
+            if not self._rx_lost:
+                return None
+
+            # The IRQ may have stored more bytes before it flagged the
+            # overflow; those are intact and come first. Head does not
+            # move once _rx_lost is set.
+            if tail == self._head:
+                # Ring drained: the line in progress lost bytes (maybe its
+                # '\n'), so discard it up to the next '\n' and accept
+                # input again.
+                self._line_skip = self.RX_OVERFLOW
+                self._rx_lost = False
+                return None
+
+    # ---------- Transmit ----------
+
+    def write_line(self, msg: str):
+        """Append one reply line to the TX buffer."""
+        with self._tx_lock:
+            self._write_line(msg)
+
+    def flush(self):
+        """Send all buffered reply bytes."""
+        with self._tx_lock:
+            self._flush()
+
+    def _write_line(self, msg: str):
+        data = msg.encode()
+        size = len(self._tx)
+        needed = len(data) + 1
+
+        if self._tx_len + needed > size:
+            self._flush()
+        if needed > size:
+            # Longer than the whole buffer: send directly
+            self.uart.write(data)
+            self.uart.write(b"\n")
+            return
+
+        end = self._tx_len + len(data)
+        self._tx_mv[self._tx_len:end] = data
+        self._tx[end] = 0x0A
+        self._tx_len = end + 1
+
+    def _flush(self):
+        if self._tx_len:
+            self.uart.write(self._tx_mv[:self._tx_len])
+            self._tx_len = 0
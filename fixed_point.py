@@ -0,0 +1,172 @@
+"""
+Integer fixed-point helpers for volumes and step calibration.
+
+The RP2040 has no FPU, and MicroPython small ints are 31-bit signed
+(largest 2**30 - 1); anything bigger is a heap-allocated long int.
+The motion path therefore works with integers that stay below 2**30:
+- volumes are volume units of 0.1 ul (UNITS_PER_ML per ml)
+- calibration is steps per volume unit in Q20 (STEP_ONE = 1 step),
+  i.e. steps_per_ml * STEP_ONE / UNITS_PER_ML
+- a position is whole steps plus a remainder in [0, STEP_ONE)
+
+Moves are applied in chunks small enough that units * calibration
+plus the remainder never exceeds SMALL_INT_MAX (see chunk_units()),
+so the remainder of one dose carries exactly into the next one.
+"""
+
+UNITS_PER_ML = 10_000
+STEP_SHIFT = 20
+STEP_ONE = 1 << STEP_SHIFT
+STEP_MASK = STEP_ONE - 1
+# Remainder of the home position: half a step, so that the whole-step
+# part of a position is the true position rounded to nearest (halves up)
+STEP_HALF = STEP_ONE >> 1
+SMALL_INT_MAX = (1 << 30) - 1
+
+_FRAC_DIGITS = 4  # 0.1 ul resolution in ml
+
+
+def steps_per_unit_q(steps_per_ml) -> int:
+    """
+    Convert a steps-per-ml calibration (int, float or str) to steps per
+    volume unit in Q20. Called once per channel at startup (intermediate
+    values may be long ints here, not in the motion path).
+    """
+    if isinstance(steps_per_ml, str):
+        q = parse_ml(steps_per_ml)
+        if q is None:
+            raise ValueError("invalid steps_per_ml: " + steps_per_ml)
+        # parse_ml gives steps_per_ml * UNITS_PER_ML
+        den = UNITS_PER_ML * UNITS_PER_ML
+        return (q * STEP_ONE + den // 2) // den
+    if isinstance(steps_per_ml, int):
+        return (steps_per_ml * STEP_ONE + UNITS_PER_ML // 2) // UNITS_PER_ML
+    return int(round(steps_per_ml * STEP_ONE / UNITS_PER_ML))
+
+
+def chunk_units(spu_q: int) -> int:
+    """
+    Largest volume (in units) that advance() applies in one piece for a
+    calibration spu_q, so that every intermediate stays a small int.
+    """
+    if spu_q <= 0:
+        raise ValueError("steps_per_ml must be > 0")
+    chunk = (SMALL_INT_MAX - STEP_ONE) // spu_q
+    if chunk < 1:
+        raise ValueError("steps_per_ml too large")
+    return chunk
+
+
+def advance(steps: int, rem: int, units: int, spu_q: int, chunk: int) -> tuple:
+    """
+    Move a position (steps, rem) by a signed volume in units.
+
+    steps: whole steps; rem: remainder in 1 / STEP_ONE steps, [0, STEP_ONE).
+    spu_q / chunk: calibration and chunk size (see chunk_units()).
+
+    Returns:
+        the new (steps, rem).
+    """
+    while units:
+        part = units
+        if part > chunk:
+            part = chunk
+        elif part < -chunk:
+            part = -chunk
+        units -= part
+
+        acc = rem + part * spu_q
+        steps += acc >> STEP_SHIFT  # floor, also for negative acc
+        rem = acc & STEP_MASK
+    return steps, rem
+
+
+def ml_to_units(volume_ml) -> int:
+    """
+    Convert a volume in ml (int or float) to volume units.
+    Only for callers that still hold float volumes (test modes).
+    """
+    if isinstance(volume_ml, int):
+        return volume_ml * UNITS_PER_ML
+    return int(round(volume_ml * UNITS_PER_ML))
+
+
+def parse_ml(s: str) -> int | None:
+    """
+    Parse a decimal ml string ("0.5", "-2", "1.25", ".3") directly into
+    volume units without going through float.
+
+    Digits beyond 0.1 ul resolution are rounded (half up).
+    Returns None if the text is not a plain decimal number.
+    """
+    n = len(s)
+    if n == 0:
+        return None
+
+    i = 0
+    negative = False
+    c = s[0]
+    if c == "-" or c == "+":
+        negative = c == "-"
+        i = 1
+
+    whole = 0
+    frac = 0
+    frac_digits = 0
+    round_up = False
+    digits = 0
+    seen_dot = False
+
+    while i < n:
+        c = s[i]
+        i += 1
+        if c == ".":
+            if seen_dot:
+                return None
+            seen_dot = True
+            continue
+
+        d = ord(c) - 48  # ord("0")
+        if d < 0 or d > 9:
+            return None
+        digits += 1
+
+        if not seen_dot:
+            whole = whole * 10 + d
+        elif frac_digits < _FRAC_DIGITS:
+            frac = frac * 10 + d
+            frac_digits += 1
+        elif frac_digits == _FRAC_DIGITS:
+            round_up = d >= 5
+            frac_digits += 1
+
+    if digits == 0:
+        return None
+
+    while frac_digits < _FRAC_DIGITS:
+        frac *= 10
+        frac_digits += 1
+
+    units = whole * UNITS_PER_ML + frac
+    if round_up:
+        units += 1
+    return -units if negative else units
+
+
+def format_ml(units: int) -> str:
+    """
+    Format volume units as ml text, e.g. 5000 -> "0.5", 20000 -> "2.0".
+    """
+    sign = ""
+    if units < 0:
+        sign = "-"
+        units = -units
+
+    whole = units // UNITS_PER_ML
+    frac = units % UNITS_PER_ML
+    if frac == 0:
+        return sign + str(whole) + ".0"
+
+    frac_s = str(frac)
+    frac_s = "0" * (_FRAC_DIGITS - len(frac_s)) + frac_s
+    return sign + str(whole) + "." + frac_s.rstrip("0")
@@ -1,52 +1,154 @@
+import gc
+import time
+
+
+class BootProfile:
+    """
+    Measures elapsed time and heap usage per boot phase.
+
+    Usage:
+        prof.begin("phase"); ...; prof.end()
+    Results are printed by report() when config.BOOT_PROFILE is True.
+    """
+
+    __slots__ = ("enabled", "phases", "_name", "_t0", "_m0")
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.phases = []
+        self._name = None
+        self._t0 = 0
+        self._m0 = 0
+
+    @staticmethod
+    def _mem_alloc() -> int:
+        # gc.mem_alloc() exists on MicroPython only
+        mem_alloc = getattr(gc, "mem_alloc", None)
+        return mem_alloc() if mem_alloc is not None else 0
+
+    def begin(self, name: str):
+        if not self.enabled:
+            return
+        gc.collect()
+        self._name = name
+        self._m0 = self._mem_alloc()
+        self._t0 = time.ticks_us()
+
+    def end(self):
+        if not self.enabled or self._name is None:
+            return
+        dt_us = time.ticks_diff(time.ticks_us(), self._t0)
+        gc.collect()
+        self.phases.append((self._name, dt_us, self._mem_alloc() - self._m0))
+        self._name = None
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("Boot profile (ms, bytes):")
+        for name, dt_us, mem in self.phases:
+            print("  {:<16} {:>8.2f} ms {:>8d} B".format(name, dt_us / 1000, mem))
+
+
+# Boot profile of the imports themselves (config, drivers, devices);
+# the phases in main() are added to the same report.
+_prof = BootProfile()
+
+_prof.begin("import config")
 import config
+_prof.end()
+_prof.enabled = config.BOOT_PROFILE
+
+_prof.begin("import drivers")
+from config_table import (
+    load_channel_table,
+    F_NAME,
+    F_DIR_PIN,
+    F_PUL_PIN,
+    F_VALVE_PIN,
+    F_LIMIT_ID,
+    F_DIR_UP,
+    F_DIR_DOWN,
+    F_STEPS_PER_ML,
+    F_VALVE_OPEN_MS,
+    F_VALVE_CLOSE_MS,
+)
 from drivers.limit_bus import LimitBus
+_prof.end()
+
+_prof.begin("import devices")
 from devices.pump_channel import PumpChannel
-from modes import mode_serial_control
+from devices import speed_profile
+_prof.end()
 
 
 def build_channels(limit_bus: LimitBus) -> list[PumpChannel]:
     """
     Create PumpChannel instances based on configuration.
     Channels with enabled=False are skipped.
+
+    Uses the precompiled channel table (config_compiled.py) if present,
+    see config_table.load_channel_table().
     """
     channels: list[PumpChannel] = []
 
-    for ch_conf in config.CHANNEL_CONFIGS:
-
-        # Skip disabled channels (enabled = False)
-        if not ch_conf.get("enabled", True):
-            print("Skipping disabled channel:", ch_conf.get("name"))
-            continue
-
+    for row in load_channel_table():
         ch = PumpChannel(
-            name=ch_conf["name"],
-            dir_pin_num=ch_conf["dir_pin"],
-            pul_pin_num=ch_conf["pul_pin"],
-            valve_pin_num=ch_conf["valve_pin"],
+            name=row[F_NAME],
+            dir_pin_num=row[F_DIR_PIN],
+            pul_pin_num=row[F_PUL_PIN],
+            valve_pin_num=row[F_VALVE_PIN],
             limit_bus=limit_bus,
-            limit_id=ch_conf["limit_id"],
-            dir_up=ch_conf.get("dir_up", config.HOMING_DIR_UP_VALUE),
-            dir_down=ch_conf.get("dir_down", config.HOMING_DIR_DOWN_VALUE),
-            steps_per_ml=ch_conf.get("steps_per_ml", config.DEFAULT_STEPS_PER_ML),
+            limit_id=row[F_LIMIT_ID],
+            dir_up=row[F_DIR_UP],
+            dir_down=row[F_DIR_DOWN],
+            steps_per_ml=row[F_STEPS_PER_ML],
+            valve_open_ms=row[F_VALVE_OPEN_MS],
+            valve_close_ms=row[F_VALVE_CLOSE_MS],
         )
         channels.append(ch)
 
     return channels
 
 
+def load_mode(name: str):
+    """
+    Import a mode module from modes/ on demand, e.g. "mode_test_all".
+    Only the selected mode is loaded into RAM.
+    """
+    package = __import__("modes." + name)
+    return getattr(package, name)
+
 
 def main():
     print("=== Mixing system startup ===")
 
+    prof = _prof
+
+    prof.begin("limit_bus")
     limit_bus = LimitBus(pin_num=config.LIMIT_BUS_PIN, pull_up=True)
+    prof.end()
 
+    prof.begin("channels")
     channels = build_channels(limit_bus)
+    prof.end()
+
+    prof.begin("speed_profile")
+    speed_profile.apply(channels)
+    prof.end()
+
+    # Choose which mode to run in config.BOOT_MODE:
+    # 1) Only CH1/CH2:  "mode_test_ch1_ch2"
+    # 2) All channels:  "mode_test_all"
+    # 3) Host control:  "mode_serial_control"
+    # 4) Speed sweep:   "mode_speed_sweep"
+    # 5) Hot-loop benchmark: "mode_bench_step"
+    prof.begin("mode_import")
+    mode = load_mode(config.BOOT_MODE)
+    prof.end()
 
-    # Choose which mode to run:
-    # 1) Only CH1/CH2:
-    # mode_test_ch1_ch2.run(channels)
+    prof.report()
 
-    # 2) All channels:
-    mode_serial_control.run(channels)
+    mode.run(channels)
 
     print("=== Mixing system finished ===")
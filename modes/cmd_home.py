@@ -0,0 +1,31 @@
+from devices.homing_group import home_all as _home_all_concurrent
+
+
+def home_bad_format(ctx, ch, args):
+    """
+    HOME without ALL; only "HOME ALL" and "CHx HOME" are valid.
+    """
+    ctx.reply("ERR HOME BAD_FORMAT")
+
+
+def home_all(ctx, ch, args):
+    """
+    HOME ALL
+    Home all channels concurrently on the shared limit bus
+    (see devices/homing_group.py).
+    """
+    failed = _home_all_concurrent(list(ctx.channels.values()))
+    if failed:
+        ctx.reply(f"ERR {failed[0]} HOME_FAILED")
+        return
+    ctx.reply("OK HOME ALL")
+
+
+def home_channel(ctx, ch, args):
+    """
+    CHx HOME
+    """
+    if ch.home():
+        ctx.reply(f"OK {ch.name} HOME")
+    else:
+        ctx.reply(f"ERR {ch.name} HOME_FAILED")
@@ -0,0 +1,19 @@
+import fixed_point
+
+
+def aspirate(ctx, ch, args):
+    """
+    CHx ASP <ml>
+    """
+    value = args[0]
+    ch.aspirate_units(value)
+    ctx.reply(f"OK {ch.name} ASP {fixed_point.format_ml(value)}")
+
+
+def dispense(ctx, ch, args):
+    """
+    CHx DISP <ml>
+    """
+    value = args[0]
+    ch.dispense_units(value)
+    ctx.reply(f"OK {ch.name} DISP {fixed_point.format_ml(value)}")
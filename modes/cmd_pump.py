@@ -0,0 +1,39 @@
+import config
+
+
+def pump_solution(ctx, ch, args):
+    """
+    PUMP SOLUTION v1 v2 v3 v4 v5
+    (volumes in ml, received here as volume units)
+
+    This is a macro-command that applies volumes to CH1..CH5.
+    At this stage we implement a conservative behavior:
+    - for each channel with volume > 0:
+        dispense_units(volume)
+    With config.PUMP_SOLUTION_USE_VALVES each dispense is gated by its
+    channel valve (ValveScheduler, no fixed dead time between channels).
+    The exact real mixing sequence (valves, aspirate->dispense, flushing)
+    can be refined later once hardware routing is finalized.
+    """
+    # Apply to CH1..CH5 in order
+    ops = []
+    for i in range(1, 6):
+        ch = ctx.channels.get(f"CH{i}")
+        if ch is None:
+            # If channel is not present/enabled, we just skip it
+            continue
+
+        v = args[i - 1]
+        if v <= 0:
+            continue
+
+        ops.append((ch, True, v))
+
+    if config.PUMP_SOLUTION_USE_VALVES:
+        from devices.valve_scheduler import ValveScheduler
+        ValveScheduler().run(ops)
+    else:
+        for ch, _, v in ops:
+            ch.dispense_units(v)
+
+    ctx.reply("OK PUMP SOLUTION")
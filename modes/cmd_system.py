@@ -0,0 +1,30 @@
+from modes import command_registry
+
+
+def init_all(ctx, ch, args):
+    """
+    INIT
+    Report all available channels.
+    """
+    names = sorted(ctx.channels.keys())
+    ctx.reply("OK INIT " + " ".join(names))
+
+
+def init_channel(ctx, ch, args):
+    """
+    CHx INIT
+    """
+    ctx.reply(f"OK {ch.name} INIT")
+
+
+def stats(ctx, ch, args):
+    """
+    STATS
+    Report call count and latency per command that has been used.
+    """
+    for cmd in command_registry.commands():
+        if not cmd.calls:
+            continue
+        avg_us = cmd.total_us // cmd.calls
+        ctx.reply(f"OK STATS {cmd.key} N={cmd.calls} AVG_US={avg_us} MAX_US={cmd.max_us}")
+    ctx.reply("OK STATS")
@@ -0,0 +1,25 @@
+from modes.telemetry import Telemetry
+
+
+def subscribe(ctx, ch, args):
+    """
+    SUBSCRIBE <rate_hz> [fields]
+    Push status frames at rate_hz (0 = unsubscribe).
+    fields: letters from telemetry.FIELDS or ALL; if omitted, the
+            previous selection is kept (ALL on the first SUBSCRIBE).
+    """
+    rate_hz = args[0]
+    fields = args[1] if len(args) > 1 else None
+
+    if ctx.transport is None:
+        ctx.reply("ERR SUBSCRIBE NO_TRANSPORT")
+        return
+
+    if ctx.telemetry is None:
+        ctx.telemetry = Telemetry(ctx.channels, ctx.transport)
+    if fields is None:
+        fields = ctx.telemetry.fields
+
+    # Reply first so it precedes the first frame
+    ctx.reply(f"OK SUBSCRIBE {rate_hz} {fields}")
+    ctx.telemetry.configure(rate_hz, fields)
@@ -0,0 +1,325 @@
+import time
+import config
+import fixed_point
+
+
+# -------- Argument parsers (declarative argument specs) --------
+#
+# Each parser takes one token and returns the parsed value,
+# or None if the token is not valid for this argument.
+
+def arg_volume(s):
+    """Volume given in ml, parsed to volume units; must be > 0."""
+    v = fixed_point.parse_ml(s)
+    if v is None or v <= 0:
+        return None
+    return v
+
+
+def arg_volume_or_skip(s):
+    """Volume given in ml, parsed to volume units; values <= 0 mean "skip"."""
+    return fixed_point.parse_ml(s)
+
+
+def arg_int(s):
+    try:
+        return int(s)
+    except Exception:
+        return None
+
+
+def arg_rate_hz(s):
+    """Telemetry rate in Hz: 0 (off) .. config.TELEMETRY_MAX_RATE_HZ."""
+    v = arg_int(s)
+    if v is None or v < 0 or v > config.TELEMETRY_MAX_RATE_HZ:
+        return None
+    return v
+
+
+def arg_fields(s):
+    """Telemetry field letters (e.g. "PHL") or "ALL"."""
+    from modes.telemetry import parse_fields
+    return parse_fields(s)
+
+
+# -------- Command table --------
+
+class Command:
+    """
+    One entry of the grammar table.
+
+    module/func: handler location inside modes/, imported on first use.
+    args: tuple of argument parsers, one per expected token.
+    min_args: number of required arguments; the rest are optional.
+    channel: True for "CHx <VERB> ..." commands; the registry resolves
+             the channel before calling the handler.
+    ch_prefix: channel commands only match if the first token starts
+               with "CH" (otherwise any name is looked up -> NOT_FOUND).
+    values_first: parse all argument tokens before checking their number
+                  (extra tokens use the last parser).
+    bad_format: reply when the number of arguments is wrong.
+    bad_value: reply when an argument does not parse ("{}" = channel name).
+    """
+
+    __slots__ = (
+        "key",
+        "module",
+        "func",
+        "args",
+        "min_args",
+        "channel",
+        "ch_prefix",
+        "values_first",
+        "bad_format",
+        "bad_value",
+        "handler",
+        "calls",
+        "total_us",
+        "max_us",
+    )
+
+    def __init__(
+        self, key, module, func, args, min_args, channel, ch_prefix, values_first,
+        bad_format, bad_value,
+    ):
+        self.key = key
+        self.module = module
+        self.func = func
+        self.args = args
+        self.min_args = min_args
+        self.channel = channel
+        self.ch_prefix = ch_prefix
+        self.values_first = values_first
+        self.bad_format = bad_format
+        self.bad_value = bad_value
+        self.handler = None
+
+        # Statistics
+        self.calls = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def load(self):
+        """Import the handler module on first use and cache the function."""
+        if self.handler is None:
+            package = __import__("modes." + self.module)
+            self.handler = getattr(getattr(package, self.module), self.func)
+        return self.handler
+
+
+class CommandContext:
+    """
+    State shared with command handlers:
+    - channels: dict "CHx" -> PumpChannel
+    - reply:    function sending one reply line to the host
+    - transport: active command transport (may be None)
+    - telemetry: Telemetry publisher once SUBSCRIBE was used, else None
+    """
+
+    __slots__ = ("channels", "reply", "transport", "telemetry")
+
+    def __init__(self, channels, reply, transport=None):
+        self.channels = channels
+        self.reply = reply
+        self.transport = transport
+        self.telemetry = None
+
+
+# Global verbs ("INIT", "HOME ALL", ...) and channel verbs ("CH ASP", ...)
+_COMMANDS = {}
+
+
+def register(
+    key,
+    module,
+    func,
+    args=(),
+    bad_format=None,
+    bad_value=None,
+    min_args=None,
+    ch_prefix=True,
+    values_first=False,
+):
+    """
+    Add a command to the grammar table.
+
+    key: "VERB" or "VERB WORD" for global commands,
+         "CH VERB" for per-channel commands ("CHx VERB ...").
+    module/func: handler modes.<module>.<func>(ctx, ch, args),
+                 where ch is the PumpChannel (None for global commands)
+                 and args the parsed argument values.
+    min_args: required argument count (default: all of args).
+    ch_prefix, values_first: see Command.
+
+    Modes add their own commands with register() or register_entries()
+    instead of editing the table below.
+    """
+    channel = key.startswith("CH ")
+    verb = key.split()[-1] if channel else key.split()[0]
+    if bad_format is None:
+        bad_format = f"ERR {verb} BAD_FORMAT"
+    if bad_value is None:
+        bad_value = "ERR {} BAD_VALUE" if channel else f"ERR {verb} BAD_VALUE"
+
+    args = tuple(args)
+    if min_args is None:
+        min_args = len(args)
+
+    cmd = Command(
+        key, module, func, args, min_args, channel, ch_prefix, values_first,
+        bad_format, bad_value,
+    )
+    _COMMANDS[key] = cmd
+    return cmd
+
+
+def register_entries(entries):
+    """
+    Register commands declared as plain data, e.g. in config.EXTRA_COMMANDS:
+
+        ("CH PRIME", "cmd_prime", "prime", ("volume",)),
+        ("FLUSH", "cmd_flush", "flush", (), {"bad_format": "ERR FLUSH"}),
+
+    Each entry is (key, module, func, args[, options]):
+    args: argument parsers, given by name ("volume" -> arg_volume) or
+          as functions; options: further keyword arguments of register().
+
+    Handler modules are not imported here; like the built-in handlers
+    they are loaded on first use (Command.load()).
+    """
+    for entry in entries:
+        key, module, func, args = entry[:4]
+        options = entry[4] if len(entry) > 4 else {}
+        parsers = tuple(a if callable(a) else globals()["arg_" + a] for a in args)
+        register(key, module, func, parsers, **options)
+
+
+def commands():
+    """All registered commands (for statistics)."""
+    return _COMMANDS.values()
+
+
+# Built-in protocol
+# INIT / HOME accept any name as channel ("FOO HOME" -> ERR FOO NOT_FOUND),
+# ASP / DISP require the CH prefix (else UNKNOWN_CMD), as in the original parser.
+register("INIT", "cmd_system", "init_all")
+register(
+    "CH INIT", "cmd_system", "init_channel",
+    bad_format="ERR INIT BAD_FORMAT", ch_prefix=False,
+)
+register("STATS", "cmd_system", "stats")
+register(
+    "SUBSCRIBE", "cmd_telemetry", "subscribe", (arg_rate_hz, arg_fields),
+    min_args=1, bad_value="ERR SUBSCRIBE BAD_VALUE",
+)
+register("HOME", "cmd_home", "home_bad_format")
+register("HOME ALL", "cmd_home", "home_all")
+register(
+    "CH HOME", "cmd_home", "home_channel",
+    bad_format="ERR HOME BAD_FORMAT", ch_prefix=False,
+)
+register(
+    "CH ASP", "cmd_move", "aspirate", (arg_volume,),
+    bad_format="ERR MOVE BAD_FORMAT", bad_value="ERR {} BAD_VOLUME",
+)
+register(
+    "CH DISP", "cmd_move", "dispense", (arg_volume,),
+    bad_format="ERR MOVE BAD_FORMAT", bad_value="ERR {} BAD_VOLUME",
+)
+register(
+    "PUMP SOLUTION", "cmd_pump", "pump_solution", (arg_volume_or_skip,) * 5,
+    bad_format="ERR PUMP EXPECT_5_VOLUMES", bad_value="ERR PUMP BAD_VOLUME",
+    values_first=True,
+)
+
+register_entries(config.EXTRA_COMMANDS)
+
+
+# -------- Dispatch --------
+
+def _lookup(tokens):
+    """
+    Find the command for a token list.
+
+    Returns:
+        (Command, index of first argument token) or (None, 0).
+    At most three dict lookups, independent of the table size.
+    """
+    n = len(tokens)
+
+    if n >= 2:
+        cmd = _COMMANDS.get(tokens[0] + " " + tokens[1])
+        if cmd is not None and not cmd.channel:
+            return cmd, 2
+
+    cmd = _COMMANDS.get(tokens[0])
+    if cmd is not None:
+        return cmd, 1
+
+    if n >= 2:
+        cmd = _COMMANDS.get("CH " + tokens[1])
+        if cmd is not None and (not cmd.ch_prefix or tokens[0].startswith("CH")):
+            return cmd, 2
+
+    return None, 0
+
+
+def dispatch(tokens, ctx) -> bool:
+    """
+    Execute one tokenized command line.
+
+    Checks run in the order of the original parser: argument count,
+    channel name, argument values (values before count for
+    values_first commands).
+
+    Returns:
+        False if no command matches (caller reports UNKNOWN_CMD).
+    """
+    cmd, first_arg = _lookup(tokens)
+    if cmd is None:
+        return False
+
+    raw = tokens[first_arg:]
+    spec = cmd.args
+    n_spec = len(spec)
+    bad_count = len(raw) < cmd.min_args or len(raw) > n_spec
+    if bad_count and not (cmd.values_first and n_spec):
+        ctx.reply(cmd.bad_format)
+        return True
+
+    ch = None
+    if cmd.channel:
+        ch_name = tokens[0]
+        ch = ctx.channels.get(ch_name)
+        if ch is None:
+            ctx.reply(f"ERR {ch_name} NOT_FOUND")
+            return True
+    else:
+        ch_name = None
+
+    args = []
+    for i, token in enumerate(raw):
+        parse = spec[i] if i < n_spec else spec[-1]
+        value = parse(token)
+        if value is None:
+            ctx.reply(cmd.bad_value.format(ch_name))
+            return True
+        args.append(value)
+
+    if bad_count:
+        ctx.reply(cmd.bad_format)
+        return True
+
+    handler = cmd.load()
+
+    t0 = time.ticks_us()
+    try:
+        handler(ctx, ch, args)
+    finally:
+        dt = time.ticks_diff(time.ticks_us(), t0)
+        cmd.calls += 1
+        cmd.total_us += dt
+        if dt > cmd.max_us:
+            cmd.max_us = dt
+
+    return True
@@ -0,0 +1,92 @@
+from drivers.stepper_tb6600 import StepperTB6600, pulse_train_py, pulse_until_py
+from drivers.limit_bus import LimitBus
+from drivers import fast_path
+import config
+import time
+
+
+def _rate(steps, t0):
+    dt_us = time.ticks_diff(time.ticks_us(), t0)
+    if dt_us <= 0:
+        return 0
+    return steps * 1_000_000 // dt_us
+
+
+def _bench_variant(kind, stepper, bus, steps):
+    """
+    Return (pulse loop steps/s, step-and-poll steps/s, bus reads/s)
+    for one hot-loop variant, with zero pulse width (pure loop overhead).
+    """
+    pul = stepper.pul
+
+    if kind == fast_path.VIPER:
+        v = fast_path.viper
+        # Never-matching compare value: bit outside in_mask
+        never = bus.in_mask << 1
+
+        t0 = time.ticks_us()
+        v.pulse_train(stepper.pul_mask, steps, 0)
+        train = _rate(steps, t0)
+
+        t0 = time.ticks_us()
+        v.pulse_until(stepper.pul_mask, bus.in_mask, never, steps, 0)
+        until = _rate(steps, t0)
+
+        t0 = time.ticks_us()
+        for _ in range(steps):
+            v.gpio_in(bus.in_mask) == bus.active_bits
+        reads = _rate(steps, t0)
+        return train, until, reads
+
+    if kind == fast_path.NATIVE:
+        train_fn = fast_path.native.pulse_train
+        until_fn = fast_path.native.pulse_until
+    else:
+        train_fn = pulse_train_py
+        until_fn = pulse_until_py
+
+    never_active = lambda: False
+
+    t0 = time.ticks_us()
+    train_fn(pul, steps, 0)
+    train = _rate(steps, t0)
+
+    t0 = time.ticks_us()
+    until_fn(pul, never_active, steps, 0)
+    until = _rate(steps, t0)
+
+    pin = bus.pin
+    active_level = 0 if bus.active_low else 1
+    t0 = time.ticks_us()
+    for _ in range(steps):
+        pin.value() == active_level
+    reads = _rate(steps, t0)
+    return train, until, reads
+
+
+def run(channels=None):
+    """
+    Benchmark of the hot-loop variants (drivers/fast_path.py).
+
+    Pulses are generated on config.BENCH_PUL_PIN and the bus is read from
+    config.BENCH_IN_PIN; both must be unused GPIOs with nothing connected,
+    so no motor moves. Reports the maximum step rate of each variant
+    (pulse width 0, i.e. pure loop overhead).
+    """
+    steps = config.BENCH_STEPS
+    stepper = StepperTB6600(
+        dir_pin_num=config.BENCH_DIR_PIN,
+        pul_pin_num=config.BENCH_PUL_PIN,
+        default_pulse_us=0,
+    )
+    bus = LimitBus(pin_num=config.BENCH_IN_PIN, pull_up=True, active_low=True)
+
+    print("=== mode_bench_step: active variant =", fast_path.MODE, "===")
+    for kind in fast_path.available():
+        train, until, reads = _bench_variant(kind, stepper, bus, steps)
+        print(
+            "  {:<7} pulse loop {:>7d} steps/s, step+poll {:>7d} steps/s, bus read {:>8d} /s".format(
+                kind, train, until, reads
+            )
+        )
+    print("=== mode_bench_step: done ===")
@@ -0,0 +1,160 @@
+from devices.pump_channel import PumpChannel
+from devices import speed_profile
+from devices import homing_group
+from drivers.stepper_group import StepperGroup
+import config
+import time
+
+
+def _pulse_schedule():
+    """
+    Tested pulse widths, from MAX_PULSE_US (slowest) down to
+    MIN_PULSE_US (fastest), always including both ends.
+    """
+    step = max(1, config.SPEED_SWEEP_PULSE_DECREMENT_US)
+    pulses = list(range(config.MAX_PULSE_US, config.MIN_PULSE_US, -step))
+    pulses.append(config.MIN_PULSE_US)
+    return pulses
+
+
+def _out_and_back(channels: list[PumpChannel], steps: int, pulse_us: int) -> list:
+    """
+    Move all channels away from the limit and back by the same number of
+    steps. Motion of different channels is independent, so all channels
+    run together on one pulse train.
+
+    After homing a plunger sits only HOMING_BACKOFF_STEPS below its
+    switch, so a channel that lost more than that on the way out would
+    be driven through the switch into the hard stop on a blind return.
+    The return leg therefore watches the limit bus and stops a channel
+    whose switch trips early.
+
+    Returns:
+        names of channels whose switch tripped on the return leg.
+    """
+    group = StepperGroup([ch.stepper for ch in channels])
+    group.step([ch.dir_down for ch in channels], steps, pulse_us)
+    time.sleep_ms(50)
+    return homing_group.move_up_guarded(channels, steps, pulse_us)
+
+
+def _rehome_counts(channels: list[PumpChannel]) -> dict:
+    """
+    Re-home all channels slowly and return the steps needed per channel
+    (None if homing failed).
+
+    Channels are homed concurrently; the shared limit bus is
+    disambiguated by devices/homing_group.py.
+    """
+    failed = homing_group.home_all(channels, pulse_us=config.HOMING_SLOW_PULSE_US)
+    counts = {}
+    for ch in channels:
+        counts[ch.name] = None if ch.name in failed else ch.last_homing_steps
+    return counts
+
+
+def _safe_pulse_us(fastest_ok: int) -> int:
+    """Apply the safety margin to the fastest reliable pulse width."""
+    pulse_us = int(fastest_ok * config.SPEED_SWEEP_MARGIN + 0.5)
+    if pulse_us > config.MAX_PULSE_US:
+        pulse_us = config.MAX_PULSE_US
+    if pulse_us < config.MIN_PULSE_US:
+        pulse_us = config.MIN_PULSE_US
+    return pulse_us
+
+
+def sweep(channels: list[PumpChannel]) -> dict:
+    """
+    Speed sweep with step-loss detection.
+
+    - home every channel and measure the baseline re-home step count
+      after an out-and-back move at the slowest speed
+    - for each faster speed: out-and-back N steps, then re-home slowly;
+      a re-home count that differs from the baseline by more than
+      SPEED_SWEEP_TOLERANCE_STEPS means steps were lost, and so does a
+      switch that trips before the return leg is complete
+    - a channel drops out of the sweep at its first failing speed
+
+    Returns:
+        {"CH1": fastest reliable pulse_us, ...} for channels that passed
+        at least the slowest speed.
+    """
+    n_steps = config.SPEED_SWEEP_STEPS
+    tolerance = config.SPEED_SWEEP_TOLERANCE_STEPS
+    pulses = _pulse_schedule()
+
+    # Initial homing
+    failed = homing_group.home_all(channels, pulse_us=config.HOMING_SLOW_PULSE_US)
+    active = [ch for ch in channels if ch.name not in failed]
+    for ch in channels:
+        if ch not in active:
+            print("  Homing FAILED for", ch.name, "- excluded from sweep.")
+    if not active:
+        return {}
+
+    # Baseline at the slowest speed
+    tripped = _out_and_back(active, n_steps, pulses[0])
+    baseline = _rehome_counts(active)
+    fastest = {}
+    for ch in list(active):
+        if ch.name in tripped or baseline[ch.name] is None:
+            print("  Baseline FAILED for", ch.name, "- excluded from sweep.")
+            active.remove(ch)
+        else:
+            fastest[ch.name] = pulses[0]
+            print("  Baseline", ch.name, "re-home steps =", baseline[ch.name])
+
+    for pulse_us in pulses[1:]:
+        if not active:
+            break
+
+        print("=== Speed sweep: pulse_us =", pulse_us, "channels =", [ch.name for ch in active])
+        tripped = _out_and_back(active, n_steps, pulse_us)
+        counts = _rehome_counts(active)
+
+        for ch in list(active):
+            if ch.name in tripped:
+                print("  ", ch.name, "FAIL at", pulse_us, "us: limit hit on return leg")
+                active.remove(ch)
+                continue
+
+            count = counts[ch.name]
+            if count is None:
+                print("  ", ch.name, "FAIL at", pulse_us, "us: homing failed")
+                active.remove(ch)
+                continue
+
+            lost = count - baseline[ch.name]
+            if lost < 0:
+                lost = -lost
+            if lost > tolerance:
+                print("  ", ch.name, "FAIL at", pulse_us, "us: lost steps =", lost)
+                active.remove(ch)
+                continue
+
+            fastest[ch.name] = pulse_us
+            print("  ", ch.name, "OK at", pulse_us, "us: deviation =", lost)
+
+    return fastest
+
+
+def run(channels: list[PumpChannel]):
+    """
+    Characterization mode: find the maximum reliable speed per channel
+    and store it (with safety margin) in config.SPEED_PROFILE_FILE.
+    """
+    if not channels:
+        print("mode_speed_sweep: no channels provided.")
+        return
+
+    print("=== mode_speed_sweep: starting ===")
+    fastest = sweep(channels)
+
+    profile = speed_profile.load()
+    for name, pulse_us in fastest.items():
+        profile[name] = _safe_pulse_us(pulse_us)
+        print("  ", name, "fastest reliable =", pulse_us, "us, profile =", profile[name], "us")
+
+    speed_profile.save(profile)
+    speed_profile.apply(channels, profile)
+    print("=== mode_speed_sweep: profile written to", config.SPEED_PROFILE_FILE, "===")
@@ -0,0 +1,201 @@
+import time
+import config
+
+
+# Field letters accepted by SUBSCRIBE
+#   P - channel position (whole steps below home, commanded)
+#   B - channel busy (moving)
+#   H - channel homed
+#   E - channel error flags (PumpChannel ERR_*)
+#   L - limit bus state (raw, 1 = some switch pressed)
+#   Q - received command bytes not yet processed: the UartTransport ring
+#       buffer fill level (not a count of queued commands; bytes still in
+#       the UART driver buffer are not included). Always 0 on
+#       StdioTransport, which cannot see into stdin.
+FIELDS = "PBHELQ"
+_CHANNEL_FIELDS = "PBHE"
+
+
+def parse_fields(s):
+    """
+    Validate a field selection ("ALL" or letters from FIELDS).
+    Returns the field string, or None if invalid.
+    """
+    if s == "ALL":
+        return FIELDS
+    for c in s:
+        if c not in FIELDS:
+            return None
+    return s
+
+
+class Telemetry:
+    """
+    Push-based status frames for SUBSCRIBE.
+
+    Frame format (one line):
+        T <seq> [L<0|1>] [Q<n>] [CHx [P<n>] [B<0|1>] [H<0|1>] [E<n>]] ...
+        F <seq> ...   same, but a full frame with every subscribed field
+
+    T frames are delta-encoded: they carry only fields that changed since
+    the previous frame and are not sent at all if nothing changed.
+    An F frame is sent after SUBSCRIBE and then at least every
+    TELEMETRY_HEARTBEAT_MS. A gap in <seq> means a frame was lost; the
+    host should then wait for the next F frame.
+
+    Frames are published from a thread on the second core when available
+    (config.TELEMETRY_USE_THREAD), so they never delay step generation.
+    Otherwise the control loop calls poll() between commands.
+
+    On StdioTransport, frames share the USB console with replies and
+    device debug lines ("Aspirate: ...", "Homing: ..."); drivers/console.py
+    keeps each line whole, so the host parser can skip every line that
+    does not start with "F " or "T ".
+    """
+
+    __slots__ = (
+        "channels",
+        "transport",
+        "limit_bus",
+        "fields",
+        "period_ms",
+        "seq",
+        "threaded",
+        "_want_full",
+        "_next_t",
+        "_last_sent_t",
+        "_last_ch",
+        "_last_bus",
+        "_last_queue",
+    )
+
+    def __init__(self, channel_map, transport):
+        """
+        channel_map: dict "CHx" -> PumpChannel
+        transport:   command transport used for the frames
+        """
+        self.channels = [channel_map[name] for name in sorted(channel_map.keys())]
+        self.transport = transport
+        self.limit_bus = self.channels[0].limit_bus if self.channels else None
+
+        self.fields = FIELDS
+        self.period_ms = 0          # 0 = not subscribed
+        self.seq = 0
+        self.threaded = False
+
+        self._want_full = True
+        self._next_t = time.ticks_ms()
+        self._last_sent_t = self._next_t
+        self._last_ch = [None] * len(self.channels)
+        self._last_bus = None
+        self._last_queue = None
+
+    # ---------- Subscription ----------
+
+    def configure(self, rate_hz: int, fields: str | None = None):
+        """
+        Set frame rate (0 = unsubscribe) and field selection.
+        The next frame is a full one.
+        """
+        if fields is not None:
+            self.fields = fields
+        self.period_ms = 1000 // rate_hz if rate_hz > 0 else 0
+        self._want_full = True
+        self._next_t = time.ticks_ms()
+
+        if self.period_ms and not self.threaded and config.TELEMETRY_USE_THREAD:
+            self._start_thread()
+
+    def _start_thread(self):
+        try:
+            import _thread
+        except ImportError:
+            return
+        try:
+            _thread.start_new_thread(self._thread_main, ())
+        except (OSError, RuntimeError):
+            # Core 1 busy or out of memory: the control loop keeps polling
+            return
+        self.threaded = True
+
+    def _thread_main(self):
+        """Publisher loop on the second core; ends on unsubscribe."""
+        try:
+            while self.period_ms:
+                self.poll()
+                wait = time.ticks_diff(self._next_t, time.ticks_ms())
+                time.sleep_ms(wait if wait > 0 else 1)
+        finally:
+            self.threaded = False
+
+    # ---------- Frames ----------
+
+    def poll(self) -> bool:
+        """
+        Send a frame if one is due and something changed (or a heartbeat
+        is due). Returns True if a frame was sent.
+        """
+        if not self.period_ms:
+            return False
+
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._next_t) < 0:
+            return False
+        self._next_t = time.ticks_add(now, self.period_ms)
+
+        full = self._want_full or (
+            time.ticks_diff(now, self._last_sent_t) >= config.TELEMETRY_HEARTBEAT_MS
+        )
+        frame = self._build(full)
+        if frame is None:
+            return False
+
+        transport = self.transport
+        transport.write_line(frame)
+        transport.flush()
+        self._want_full = False
+        self._last_sent_t = now
+        return True
+
+    def _build(self, full: bool):
+        """Build a frame string, or None if a delta frame would be empty."""
+        fields = self.fields
+        parts = []
+
+        if "L" in fields and self.limit_bus is not None:
+            bus = 1 if self.limit_bus.is_active_raw() else 0
+            if full or bus != self._last_bus:
+                parts.append("L" + str(bus))
+            self._last_bus = bus
+
+        if "Q" in fields:
+            queue = self.transport.rx_pending()
+            if full or queue != self._last_queue:
+                parts.append("Q" + str(queue))
+            self._last_queue = queue
+
+        for i, ch in enumerate(self.channels):
+            state = (
+                ch.position_steps,
+                1 if ch.busy else 0,
+                1 if ch.homed else 0,
+                ch.error,
+            )
+            last = self._last_ch[i]
+
+            ch_parts = []
+            for k in range(4):
+                code = _CHANNEL_FIELDS[k]
+                if code in fields and (full or last is None or state[k] != last[k]):
+                    ch_parts.append(code + str(state[k]))
+            self._last_ch[i] = state
+
+            if ch_parts:
+                parts.append(ch.name)
+                parts.extend(ch_parts)
+
+        if not parts and not full:
+            return None
+
+        self.seq += 1
+        return ("F " if full else "T ") + str(self.seq) + (" " + " ".join(parts) if parts else "")
@@ -0,0 +1,456 @@
+"""
+Host-side batch planner for PUMP SOLUTION recipes.
+
+Runs on the PC (CPython + NumPy), NOT on the microcontroller.
+
+Takes a whole recipe table (CSV file, text file with "PUMP SOLUTION ..."
+lines or a NumPy array with one row per entry and one column per channel)
+and computes in one vectorized pass:
+- step counts per entry and channel (same fixed-point arithmetic and
+  fractional-step carry as PumpChannel)
+- refill points, assuming every syringe starts empty after homing
+- per-channel timelines and the total makespan (per-channel speed from
+  the speed profile, valve switching latency when PUMP SOLUTION is
+  valve-gated)
+- a compact command stream for mode_serial_control
+
+Usage:
+    python -m tools.batch_planner recipe.csv [-o commands.txt]
+"""
+
+import argparse
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - host tool only
+    np = None
+
+import config
+import fixed_point
+from channel_config import CHANNEL_CONFIGS
+from devices import speed_profile
+
+
+CHANNEL_COUNT = 5        # PUMP SOLUTION always carries 5 volumes
+DIR_SETUP_US = 50        # matches the DIR settle time in StepperTB6600.step()
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("batch_planner requires NumPy (pip install numpy)")
+
+
+# -------- Recipe loading --------
+
+def _parse_recipe_line(line):
+    """
+    Return a list of volumes for one recipe line, or None for lines
+    that carry no entry (blank, comment).
+
+    Raises:
+        ValueError if a token is not a number (the caller decides whether
+        the line is a header).
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    tokens = line.replace(",", " ").replace(";", " ").split()
+    if len(tokens) >= 2 and tokens[0].upper() == "PUMP" and tokens[1].upper() == "SOLUTION":
+        tokens = tokens[2:]
+
+    vols = []
+    for t in tokens:
+        try:
+            vols.append(float(t))
+        except ValueError:
+            raise ValueError(f"bad volume {t!r}") from None
+    return vols
+
+
+def load_recipe(path):
+    """
+    Load a recipe table from a text file.
+
+    Accepted formats (may be mixed):
+    - CSV rows "v1,v2,v3,v4,v5" (an optional header row, i.e. a first
+      non-comment line that is not numeric, is skipped)
+    - protocol lines "PUMP SOLUTION v1 v2 v3 v4 v5"
+
+    Returns:
+        float array of shape (entries, CHANNEL_COUNT), volumes in ml.
+
+    Raises:
+        ValueError with path:lineno for any other line that does not parse.
+    """
+    _require_numpy()
+
+    rows = []
+    first = True
+    with open(path) as f:
+        for lineno, line in enumerate(f, start=1):
+            try:
+                vols = _parse_recipe_line(line)
+            except ValueError as e:
+                is_protocol = line.strip().upper().startswith("PUMP")
+                if first and not is_protocol:
+                    # Header row such as "v1,v2,v3,v4,v5"
+                    first = False
+                    continue
+                raise ValueError(f"{path}:{lineno}: {e}") from None
+            if vols is None:
+                continue
+            first = False
+            if len(vols) != CHANNEL_COUNT:
+                raise ValueError(
+                    f"{path}:{lineno}: expected {CHANNEL_COUNT} volumes, got {len(vols)}"
+                )
+            rows.append(vols)
+
+    return np.array(rows, dtype=float).reshape(-1, CHANNEL_COUNT)
+
+
+def channel_steps_per_ml():
+    """
+    Calibration per channel position (CH1..CH5) taken from channel_config.
+    """
+    spm = [float(config.DEFAULT_STEPS_PER_ML)] * CHANNEL_COUNT
+    for i, ch_conf in enumerate(CHANNEL_CONFIGS[:CHANNEL_COUNT]):
+        spm[i] = float(ch_conf.get("steps_per_ml", config.DEFAULT_STEPS_PER_ML))
+    return spm
+
+
+def channel_pulse_us(profile=None):
+    """
+    Pulse width per channel position (CH1..CH5) as the controller uses it:
+    the speed profile entry (clamped like PumpChannel.set_pulse_us()),
+    else config.DEFAULT_PULSE_US.
+
+    profile: dict as returned by speed_profile.load(); loaded from
+             config.SPEED_PROFILE_FILE if None.
+    """
+    if profile is None:
+        profile = speed_profile.load()
+
+    pulse = [config.DEFAULT_PULSE_US] * CHANNEL_COUNT
+    for i in range(CHANNEL_COUNT):
+        v = profile.get(f"CH{i + 1}")
+        if v is None:
+            continue
+        pulse[i] = min(max(int(v), config.MIN_PULSE_US), config.MAX_PULSE_US)
+    return pulse
+
+
+def channel_valve_ms():
+    """
+    Valve (open_ms, close_ms) lists per channel position (CH1..CH5),
+    with the same defaults as config_table.
+    """
+    open_ms = [config.VALVE_OPEN_MS] * CHANNEL_COUNT
+    close_ms = [config.VALVE_CLOSE_MS] * CHANNEL_COUNT
+    for i, ch_conf in enumerate(CHANNEL_CONFIGS[:CHANNEL_COUNT]):
+        open_ms[i] = ch_conf.get("valve_open_ms", config.VALVE_OPEN_MS)
+        close_ms[i] = ch_conf.get("valve_close_ms", config.VALVE_CLOSE_MS)
+    return open_ms, close_ms
+
+
+# -------- Planning --------
+
+def _refill_column(vol_units, cap_units):
+    """
+    Find refill points for one channel.
+
+    A refill tops the syringe up to full capacity right before the first
+    entry that no longer fits into what is left. Only the refill points
+    are visited (binary search over the cumulative usage), not every entry.
+
+    Returns:
+        int array with the volume (units) to aspirate before each entry.
+    """
+    refill = np.zeros(vol_units.shape[0], dtype=np.int64)
+    used = np.nonzero(vol_units)[0]
+    if used.size == 0:
+        return refill
+
+    # Homed syringe is empty: fill completely before the first dose
+    refill[used[0]] = cap_units
+
+    cum = np.cumsum(vol_units)
+    base = 0
+    while True:
+        idx = int(np.searchsorted(cum, base + cap_units, side="right"))
+        if idx >= vol_units.shape[0]:
+            break
+        consumed = int(cum[idx - 1]) - base
+        refill[idx] = consumed
+        base = int(cum[idx - 1])
+
+    return refill
+
+
+def _carry_steps(refill_units, disp_units, spu_q):
+    """
+    Step counts for every refill and dispense, reproducing the
+    fractional-step carry of PumpChannel (fixed_point.advance()): each
+    move is the difference of the whole-step positions before and after
+    it. The controller applies moves in chunks to stay within small ints;
+    the sum is the same, so the whole cumulative product is used here.
+
+    Returns:
+        (refill_steps, dispense_steps), int arrays shaped like the inputs.
+    """
+    n = disp_units.shape[0]
+    # Interleave per entry: refill (away from home, +) then dispense (-)
+    moves = np.empty((n, 2, CHANNEL_COUNT), dtype=np.int64)
+    moves[:, 0, :] = refill_units
+    moves[:, 1, :] = -disp_units
+    moves = moves.reshape(2 * n, CHANNEL_COUNT)
+
+    # Home position: 0 steps, remainder STEP_HALF (see fixed_point)
+    pos_q = np.cumsum(moves, axis=0) * spu_q + fixed_point.STEP_HALF
+    pos_steps = pos_q >> fixed_point.STEP_SHIFT
+    pos_steps = np.vstack([np.zeros((1, CHANNEL_COUNT), dtype=np.int64), pos_steps])
+    steps = np.abs(np.diff(pos_steps, axis=0)).reshape(n, 2, CHANNEL_COUNT)
+
+    return steps[:, 0, :], steps[:, 1, :]
+
+
+def _dispense_overhead(steps, period_us, open_us, close_us):
+    """
+    Valve latency that ValveScheduler cannot hide, per dispense move.
+
+    The first valve of an entry is waited for in full (DIR setup overlaps
+    with it). Every following valve is switched on _lead_steps() before
+    the previous move ends, so only what is left of its opening time
+    delays the move. After the last move of an entry the scheduler waits
+    until that valve is closed.
+
+    Returns:
+        (before_us, after_us), int arrays shaped like steps.
+    """
+    n = steps.shape[0]
+    before = np.zeros_like(steps)
+    after = np.zeros_like(steps)
+
+    prev_period = np.zeros(n, dtype=np.int64)  # 0 = first move of the entry
+    prev_steps = np.zeros(n, dtype=np.int64)
+    last = np.full(n, -1)
+    for c in range(CHANNEL_COUNT):
+        active = steps[:, c] > 0
+        # Same rounding and cap as ValveScheduler._lead_steps()
+        lead = np.minimum(-(-open_us[c] // np.maximum(prev_period, 1)), prev_steps)
+        wait = np.where(
+            prev_period > 0,
+            np.maximum(open_us[c] - lead * prev_period, 0),
+            max(open_us[c], DIR_SETUP_US),
+        )
+        before[:, c] = np.where(active, wait, 0)
+        prev_period = np.where(active, period_us[c], prev_period)
+        prev_steps = np.where(active, steps[:, c], prev_steps)
+        last = np.where(active, c, last)
+
+    rows = np.nonzero(last >= 0)[0]
+    after[rows, last[rows]] = close_us[last[rows]]
+    return before, after
+
+
+def plan(
+    volumes_ml,
+    steps_per_ml=None,
+    capacity_ml=None,
+    pulse_us=None,
+    use_valves=None,
+    valve_open_ms=None,
+    valve_close_ms=None,
+):
+    """
+    Plan a whole recipe table.
+
+    volumes_ml: array-like of shape (entries, 5), volumes in ml.
+    steps_per_ml: scalar or per-channel sequence; defaults to config.
+    capacity_ml: scalar or per-channel sequence; defaults to
+                 config.SYRINGE_CAPACITY_ML.
+    pulse_us: scalar or per-channel sequence; defaults to the speed
+              profile (see channel_pulse_us()).
+    use_valves: whether PUMP SOLUTION is valve-gated; defaults to
+                config.PUMP_SOLUTION_USE_VALVES.
+    valve_open_ms / valve_close_ms: scalar or per-channel sequence;
+                defaults to channel_config / config.VALVE_*_MS.
+
+    Returns:
+        dict of NumPy arrays (see keys below).
+    """
+    _require_numpy()
+
+    vols = np.asarray(volumes_ml, dtype=float)
+    if vols.ndim == 1:
+        vols = vols.reshape(1, -1)
+    if vols.ndim != 2 or vols.shape[1] != CHANNEL_COUNT:
+        raise ValueError(f"recipe must have {CHANNEL_COUNT} columns, got shape {vols.shape}")
+    if not np.isfinite(vols).all() or (vols < 0).any():
+        raise ValueError("recipe volumes must be finite and non-negative")
+
+    if steps_per_ml is None:
+        steps_per_ml = channel_steps_per_ml()
+    if capacity_ml is None:
+        capacity_ml = config.SYRINGE_CAPACITY_ML
+    if pulse_us is None:
+        pulse_us = channel_pulse_us()
+    if use_valves is None:
+        use_valves = config.PUMP_SOLUTION_USE_VALVES
+    if valve_open_ms is None or valve_close_ms is None:
+        default_open_ms, default_close_ms = channel_valve_ms()
+        if valve_open_ms is None:
+            valve_open_ms = default_open_ms
+        if valve_close_ms is None:
+            valve_close_ms = default_close_ms
+
+    spm = np.broadcast_to(np.asarray(steps_per_ml, dtype=float), (CHANNEL_COUNT,))
+    cap_ml = np.broadcast_to(np.asarray(capacity_ml, dtype=float), (CHANNEL_COUNT,))
+    pulse = np.broadcast_to(np.asarray(pulse_us, dtype=np.int64), (CHANNEL_COUNT,))
+    open_us = np.broadcast_to(np.asarray(valve_open_ms, dtype=np.int64) * 1000, (CHANNEL_COUNT,))
+    close_us = np.broadcast_to(np.asarray(valve_close_ms, dtype=np.int64) * 1000, (CHANNEL_COUNT,))
+
+    # Same integer units as the controller (see fixed_point)
+    spu_q = np.array([fixed_point.steps_per_unit_q(float(v)) for v in spm], dtype=np.int64)
+    vol_units = np.rint(vols * fixed_point.UNITS_PER_ML).astype(np.int64)
+    cap_units = np.rint(cap_ml * fixed_point.UNITS_PER_ML).astype(np.int64)
+
+    too_big = vol_units > cap_units
+    if too_big.any():
+        entry, ch = np.argwhere(too_big)[0]
+        raise ValueError(
+            f"entry {entry}: CH{ch + 1} volume {vols[entry, ch]} ml exceeds syringe capacity"
+        )
+
+    refill_units = np.stack(
+        [_refill_column(vol_units[:, c], int(cap_units[c])) for c in range(CHANNEL_COUNT)],
+        axis=1,
+    )
+    refill_steps, steps = _carry_steps(refill_units, vol_units, spu_q)
+
+    # Duration of every move in microseconds (constant speed, see StepperTB6600)
+    period_us = 2 * pulse
+    if use_valves:
+        before_us, after_us = _dispense_overhead(steps, period_us, open_us, close_us)
+        disp_us = np.where(steps > 0, steps * period_us + before_us + after_us, 0)
+    else:
+        disp_us = np.where(steps > 0, steps * period_us + DIR_SETUP_US, 0)
+    # CHn ASP is not valve-gated
+    refill_us = np.where(refill_steps > 0, refill_steps * period_us + DIR_SETUP_US, 0)
+
+    # Controller executes one command at a time: refills of an entry first
+    # (CH1..CH5), then the PUMP SOLUTION dispenses (CH1..CH5).
+    seq_us = np.hstack([refill_us, disp_us])
+    end_us = np.cumsum(seq_us.ravel()).reshape(seq_us.shape)
+    start_us = end_us - seq_us
+
+    return {
+        "volumes_ml": vols,
+        "volumes_units": vol_units,
+        "steps": steps,
+        "refill_units": refill_units,
+        "refill_steps": refill_steps,
+        "refill_start_us": start_us[:, :CHANNEL_COUNT],
+        "refill_end_us": end_us[:, :CHANNEL_COUNT],
+        "dispense_start_us": start_us[:, CHANNEL_COUNT:],
+        "dispense_end_us": end_us[:, CHANNEL_COUNT:],
+        "channel_busy_us": (disp_us + refill_us).sum(axis=0),
+        "makespan_us": int(end_us[-1, -1]) if end_us.size else 0,
+    }
+
+
+# -------- Output --------
+
+def command_stream(p):
+    """
+    Build the command lines for mode_serial_control.
+
+    Entries with all volumes zero are dropped.
+    """
+    lines = []
+    vols = p["volumes_units"]
+    refill = p["refill_units"]
+    fmt = fixed_point.format_ml
+
+    for i in range(vols.shape[0]):
+        for c in np.nonzero(refill[i])[0]:
+            lines.append(f"CH{c + 1} ASP {fmt(int(refill[i, c]))}")
+        if (vols[i] > 0).any():
+            lines.append("PUMP SOLUTION " + " ".join(fmt(int(v)) for v in vols[i]))
+
+    return lines
+
+
+def summary(p):
+    """
+    Expected throughput figures for a planned recipe.
+    """
+    makespan_s = p["makespan_us"] / 1e6
+    entries = int((p["volumes_units"] > 0).any(axis=1).sum())
+    total_ml = p["volumes_ml"].sum(axis=0)
+
+    return {
+        "entries": entries,
+        "refills": (p["refill_units"] > 0).sum(axis=0).tolist(),
+        "total_ml": total_ml.tolist(),
+        "makespan_s": makespan_s,
+        "entries_per_hour": entries * 3600.0 / makespan_s if makespan_s > 0 else 0.0,
+        "ml_per_min": total_ml.sum() * 60.0 / makespan_s if makespan_s > 0 else 0.0,
+        "channel_utilization": (p["channel_busy_us"] / p["makespan_us"]).tolist()
+        if p["makespan_us"] > 0 else [0.0] * CHANNEL_COUNT,
+    }
+
+
+def format_summary(s):
+    out = [
+        f"entries:          {s['entries']}",
+        f"makespan:         {s['makespan_s']:.1f} s",
+        f"throughput:       {s['entries_per_hour']:.1f} entries/h, {s['ml_per_min']:.3f} ml/min",
+    ]
+    for c in range(CHANNEL_COUNT):
+        out.append(
+            f"CH{c + 1}: {s['total_ml'][c]:.3f} ml, {s['refills'][c]} refill(s), "
+            f"{100.0 * s['channel_utilization'][c]:.1f}% busy"
+        )
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a PUMP SOLUTION recipe table.")
+    parser.add_argument("recipe", help="CSV or PUMP SOLUTION text file")
+    parser.add_argument("-o", "--output", help="write command stream to this file")
+    parser.add_argument("--capacity-ml", type=float, default=None)
+    parser.add_argument("--pulse-us", type=int, default=None,
+                        help="same pulse width for all channels (default: speed profile)")
+    parser.add_argument("--speed-profile", default=None,
+                        help=f"speed profile JSON (default: {config.SPEED_PROFILE_FILE})")
+    parser.add_argument("--valves", action=argparse.BooleanOptionalAction, default=None,
+                        help="PUMP SOLUTION is valve-gated (default: config.PUMP_SOLUTION_USE_VALVES)")
+    args = parser.parse_args(argv)
+
+    pulse_us = args.pulse_us
+    if pulse_us is None:
+        pulse_us = channel_pulse_us(speed_profile.load(args.speed_profile))
+
+    p = plan(
+        load_recipe(args.recipe),
+        capacity_ml=args.capacity_ml,
+        pulse_us=pulse_us,
+        use_valves=args.valves,
+    )
+    lines = command_stream(p)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines) + "\n")
+    else:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+    sys.stderr.write(format_summary(summary(p)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
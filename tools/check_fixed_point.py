@@ -0,0 +1,153 @@
+"""
+Host-side checks for fixed_point.py and the batch planner carry.
+
+Usage:
+    python -m tools.check_fixed_point
+
+Verifies that volume parsing / formatting is exact, that repeated small
+doses land on the same step as one large dose (no drift), that every
+intermediate value of the motion math stays a MicroPython small int,
+and that tools/batch_planner.py computes the same step counts as the
+controller. Exits with status 1 on the first failure.
+"""
+
+import random
+import sys
+from fractions import Fraction
+
+import fixed_point as fp
+
+
+CALIBRATIONS = (362, 200, 3200, 362.5, "362.25", 1)
+
+
+def check(cond, what):
+    if not cond:
+        raise AssertionError(what)
+
+
+def check_parse_format():
+    cases = {
+        "0.5": 5000,
+        "1.25": 12500,
+        ".3": 3000,
+        "-2": -20000,
+        "+0.001": 10,
+        "0.00005": 1,
+        "0.00004": 0,
+        "5.0001": 50001,
+    }
+    for text, units in cases.items():
+        check(fp.parse_ml(text) == units, f"parse_ml({text!r}) == {units}")
+        back = fp.parse_ml(fp.format_ml(units))
+        check(back == units, f"parse_ml(format_ml({units})) == {units}")
+
+    for text in ("", "-", ".", "1.2.3", "1e-3", "abc", "1,5"):
+        check(fp.parse_ml(text) is None, f"parse_ml({text!r}) is None")
+
+    check(fp.format_ml(20000) == "2.0", "format_ml(20000)")
+    check(fp.format_ml(10) == "0.001", "format_ml(10)")
+    check(fp.format_ml(-5) == "-0.0005", "format_ml(-5)")
+
+
+class _Channel:
+    """Position bookkeeping exactly as in PumpChannel."""
+
+    def __init__(self, steps_per_ml):
+        self.spu_q = fp.steps_per_unit_q(steps_per_ml)
+        self.chunk = fp.chunk_units(self.spu_q)
+        self.steps = 0
+        self.rem = fp.STEP_HALF
+
+    def move(self, units):
+        old = self.steps
+        self.steps, self.rem = fp.advance(old, self.rem, units, self.spu_q, self.chunk)
+        check(0 <= self.rem < fp.STEP_ONE, "remainder in [0, STEP_ONE)")
+        return self.steps - old
+
+
+def check_small_ints():
+    for spm in CALIBRATIONS:
+        spu_q = fp.steps_per_unit_q(spm)
+        chunk = fp.chunk_units(spu_q)
+        # Largest |acc| in advance(): remainder plus one full chunk
+        check(fp.STEP_MASK + chunk * spu_q <= fp.SMALL_INT_MAX, f"{spm}: positive chunk fits")
+        check(-chunk * spu_q >= -fp.SMALL_INT_MAX - 1, f"{spm}: negative chunk fits")
+        check(spu_q <= fp.SMALL_INT_MAX, f"{spm}: calibration fits")
+
+
+def check_no_drift():
+    for spm in CALIBRATIONS:
+        exact_spm = Fraction(str(spm))
+
+        # 1000 x CH1 ASP 0.001 == CH1 ASP 1.0
+        small = _Channel(spm)
+        for _ in range(1000):
+            small.move(fp.parse_ml("0.001"))
+        big = _Channel(spm)
+        big.move(fp.parse_ml("1.0"))
+        check((small.steps, small.rem) == (big.steps, big.rem), f"{spm}: 1000 x 0.001 ml == 1 ml")
+
+        # Within half a step (plus calibration quantization) of the ideal
+        ideal = exact_spm * 1
+        err = abs(small.steps - ideal)
+        check(err <= Fraction(1, 2) + Fraction(fp.UNITS_PER_ML, fp.STEP_ONE), f"{spm}: 1 ml ~ {ideal} steps")
+
+        # Large moves are chunked; the result equals one exact product
+        ch = _Channel(spm)
+        total = 0
+        for units in (fp.parse_ml("5.0"), fp.parse_ml("-3.3333"), fp.parse_ml("12.5")):
+            ch.move(units)
+            total += units
+        q = total * ch.spu_q + fp.STEP_HALF
+        check((ch.steps, ch.rem) == (q >> fp.STEP_SHIFT, q & fp.STEP_MASK), f"{spm}: chunked == exact")
+
+        # Random aspirate / dispense cycles return exactly home
+        rng = random.Random(spm if isinstance(spm, int) else 7)
+        ch = _Channel(spm)
+        doses = [rng.randint(1, 20000) for _ in range(500)]
+        for units in doses:
+            ch.move(units)
+        for units in reversed(doses):
+            ch.move(-units)
+        check((ch.steps, ch.rem) == (0, fp.STEP_HALF), f"{spm}: returns home exactly")
+
+
+def check_planner():
+    try:
+        import numpy as np
+    except ImportError:
+        print("  planner: skipped (NumPy not installed)")
+        return
+    from tools import batch_planner
+
+    rng = random.Random(1)
+    vols = [[rng.choice((0, 0.001, 0.0375, 0.25, 1.2, 2.0)) for _ in range(5)] for _ in range(300)]
+    spm = [362, 200, 3200, 362.5, 1]
+    p = batch_planner.plan(vols, steps_per_ml=spm, capacity_ml=5.0)
+
+    chans = [_Channel(v) for v in spm]
+    for i in range(len(vols)):
+        for c in range(5):
+            got = chans[c].move(int(p["refill_units"][i, c]))
+            check(got == p["refill_steps"][i, c], f"planner refill {i} CH{c + 1}")
+        for c in range(5):
+            got = -chans[c].move(-int(p["volumes_units"][i, c]))
+            check(got == p["steps"][i, c], f"planner dispense {i} CH{c + 1}")
+    check(np.array_equal(p["volumes_units"][1], [fp.ml_to_units(v) for v in vols[1]]), "planner units")
+
+
+def main():
+    checks = (check_parse_format, check_small_ints, check_no_drift, check_planner)
+    for fn in checks:
+        try:
+            fn()
+        except AssertionError as e:
+            print("FAIL", fn.__name__ + ":", e)
+            return 1
+        print("ok  ", fn.__name__)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
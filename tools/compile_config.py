@@ -0,0 +1,53 @@
+"""
+Compile channel_config.CHANNEL_CONFIGS into config_compiled.py (host side).
+
+Usage:
+    python -m tools.compile_config [-o config_compiled.py]
+
+Copy the generated file to the board next to config.py, together with
+the same config.py and channel_config.py it was compiled from.
+Re-run after every change of config.py or channel_config.py; the board
+detects a stale table (TABLE_VERSION / CONFIG_HASH) and then compiles
+the dicts at boot instead.
+"""
+
+import argparse
+import os
+import sys
+
+import config
+from channel_config import CHANNEL_CONFIGS
+from config_table import compile_channels, source_hash, SOURCE_FILES, TABLE_VERSION
+
+
+def render(table, config_hash):
+    lines = [
+        "# Generated by tools/compile_config.py - do not edit.",
+        "# Row layout: see config_table.F_* constants.",
+        "TABLE_VERSION = " + str(TABLE_VERSION),
+        "CONFIG_HASH = " + hex(config_hash),
+        "CHANNEL_TABLE = (",
+    ]
+    for row in table:
+        lines.append("    " + repr(row) + ",")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile channel config into tuples.")
+    parser.add_argument("-o", "--output", default="config_compiled.py")
+    args = parser.parse_args(argv)
+
+    table = compile_channels(CHANNEL_CONFIGS)
+    root = os.path.dirname(os.path.abspath(config.__file__))
+    config_hash = source_hash([os.path.join(root, name) for name in SOURCE_FILES])
+    with open(args.output, "w") as f:
+        f.write(render(table, config_hash))
+
+    print("Wrote", len(table), "channels to", args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())